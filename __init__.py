@@ -2,5 +2,6 @@
 from .user import User
 from .team import Team
 from .project_board import ProjectBoard
+from .async_api import AsyncUser, AsyncTeam, AsyncProjectBoard
 
-__all__ = ["User", "Team", "ProjectBoard"]
+__all__ = ["User", "Team", "ProjectBoard", "AsyncUser", "AsyncTeam", "AsyncProjectBoard"]
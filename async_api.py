@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import weakref
+
+from .project_board import ProjectBoard
+from .team import Team
+from .user import User
+
+# storage -> {(manager, method name, arguments): future of a read in flight},
+# shared by every async manager over that storage
+_in_flight_reads = weakref.WeakKeyDictionary()
+
+
+class _AsyncManager:
+    """
+    Runs the methods of a sync manager on a thread pool so they never block
+    the event loop.
+
+    The managers are thread-safe, and the storage loads a collection once
+    even when several threads ask for it at the same time. On top of that,
+    identical read requests that arrive while one is still running share
+    its result instead of doing the work again. A read never joins one that
+    started before a write finished, so callers see their own writes.
+    """
+
+    def __init__(self, manager, executor=None):
+        """Wrap a sync manager; executor defaults to the loop's thread pool"""
+        self.manager = manager
+        self.storage = manager.storage
+        self._executor = executor
+        self._in_flight = _in_flight_reads.setdefault(self.storage, {})
+
+    async def _call(self, method, *args):
+        """Call a manager method on the executor and wait for its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+    async def _run(self, method, *args):
+        """Like _call, for calls that may write"""
+        try:
+            return await self._call(method, *args)
+        finally:
+            # Reads already in flight may predate the write, so later reads
+            # start afresh instead of joining them
+            self._in_flight.clear()
+
+    async def _shared(self, method, *args):
+        """Like _call, but concurrent identical reads share one execution"""
+        key = (type(self.manager).__name__, method.__name__, args)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._call(method, *args))
+            self._in_flight[key] = future
+            future.add_done_callback(
+                lambda done: self._in_flight.pop(key) if self._in_flight.get(key) is done else None)
+        # One caller giving up must not cancel the others
+        return await asyncio.shield(future)
+
+
+class AsyncUser(_AsyncManager):
+    """Async counterpart of User"""
+
+    def __init__(self, storage=None, backend="json", executor=None):
+        """Create the underlying User manager over the given storage"""
+        super().__init__(User(storage, backend), executor)
+
+    async def create_user(self, request: str) -> str:
+        """Create a new user"""
+        return await self._run(self.manager.create_user, request)
+
+    async def import_users(self, source, chunk_size: int = 1000) -> str:
+        """Bulk-create users from a stream of user specs"""
+        return await self._run(self.manager.import_users, source, chunk_size)
+
+    async def list_users(self, request: str = None) -> str:
+        """List all users, or one page of them"""
+        return await self._shared(self.manager.list_users, request)
+
+    async def describe_user(self, request: str) -> str:
+        """Get details of a specific user"""
+        return await self._shared(self.manager.describe_user, request)
+
+    async def update_user(self, request: str) -> str:
+        """Update user details (display_name only, name cannot be changed)"""
+        return await self._run(self.manager.update_user, request)
+
+    async def get_user_teams(self, request: str) -> str:
+        """Get all teams that a user belongs to"""
+        return await self._shared(self.manager.get_user_teams, request)
+
+
+class AsyncTeam(_AsyncManager):
+    """Async counterpart of Team"""
+
+    def __init__(self, storage=None, backend="json", executor=None):
+        """Create the underlying Team manager over the given storage"""
+        super().__init__(Team(storage, backend), executor)
+
+    async def create_team(self, request: str) -> str:
+        """Create a new team"""
+        return await self._run(self.manager.create_team, request)
+
+    async def list_teams(self, request: str = None) -> str:
+        """List all teams, or one page of them"""
+        return await self._shared(self.manager.list_teams, request)
+
+    async def describe_team(self, request: str) -> str:
+        """Get details of a specific team"""
+        return await self._shared(self.manager.describe_team, request)
+
+    async def update_team(self, request: str) -> str:
+        """Update team details"""
+        return await self._run(self.manager.update_team, request)
+
+    async def add_users_to_team(self, request: str):
+        """Add users to a team, all or none"""
+        return await self._run(self.manager.add_users_to_team, request)
+
+    async def remove_users_from_team(self, request: str):
+        """Remove users from a team (never the admin)"""
+        return await self._run(self.manager.remove_users_from_team, request)
+
+    async def list_team_users(self, request: str):
+        """List all users in a team"""
+        return await self._shared(self.manager.list_team_users, request)
+
+
+class AsyncProjectBoard(_AsyncManager):
+    """Async counterpart of ProjectBoard"""
+
+    def __init__(self, storage=None, backend="json", executor=None):
+        """Create the underlying ProjectBoard manager over the given storage"""
+        super().__init__(ProjectBoard(storage, backend), executor)
+
+    async def create_board(self, request: str):
+        """Create a new project board for a team"""
+        return await self._run(self.manager.create_board, request)
+
+    async def close_board(self, request: str) -> str:
+        """Close a board (only if all tasks are COMPLETE)"""
+        return await self._run(self.manager.close_board, request)
+
+    async def add_task(self, request: str) -> str:
+        """Add a task to a board"""
+        return await self._run(self.manager.add_task, request)
+
+    async def add_tasks(self, request: str) -> str:
+        """Add many tasks in one call"""
+        return await self._run(self.manager.add_tasks, request)
+
+    async def update_task_status(self, request: str):
+        """Update the status of a task"""
+        return await self._run(self.manager.update_task_status, request)
+
+    async def update_task_statuses(self, request: str) -> str:
+        """Update the status of many tasks with a single write"""
+        return await self._run(self.manager.update_task_statuses, request)
+
+    async def list_boards(self, request: str) -> str:
+        """List all boards for a team, optionally only those with a given status"""
+        return await self._shared(self.manager.list_boards, request)
+
+    async def export_board(self, request: str) -> str:
+        """Export a board, reusing its last export if unchanged"""
+        # A call may write a file, so calls are never shared
+        return await self._run(self.manager.export_board, request)
+
+    async def export_boards(self, request: str = None) -> str:
+        """Export many boards at once on a pool of worker processes"""
+        return await self._run(self.manager.export_boards, request)
@@ -0,0 +1,100 @@
+"""
+Benchmark of the asyncio API against calling the sync API from coroutines
+
+Each simulated request adds a task and then lists the team's boards and
+the board's team members. Requests run with increasing concurrency on one
+event loop, once through the sync managers (which block the loop) and once
+through the async ones. Besides throughput, a heartbeat coroutine measures
+how long the loop was stalled, which is what other requests on the loop
+would feel.
+
+To run: python -m planner.bench_async [requests] [backend]
+"""
+
+from planner.async_api import AsyncProjectBoard, AsyncTeam
+from planner.project_board import ProjectBoard
+from planner.storage import open_storage
+from planner.team import Team
+from planner.user import User
+import asyncio
+import json
+import sys
+import tempfile
+import time
+
+def setup(backend):
+    """Create a user, a team and a board in a fresh db folder"""
+    storage = open_storage(tempfile.mkdtemp(prefix="planner_bench_"), backend)
+    User(storage=storage).create_user(json.dumps({"name": "bench_user", "display_name": "Bench User"}))
+    Team(storage=storage).create_team(json.dumps({
+        "name": "bench_team", "description": "Benchmark team", "admin": "user_1"}))
+    ProjectBoard(storage=storage).create_board(json.dumps({
+        "name": "bench_board", "description": "Benchmark board", "team_id": "team_1"}))
+    return storage
+
+async def heartbeat(ticks):
+    """Record when the loop gets to run a coroutine that sleeps 1ms at a time"""
+    while True:
+        ticks.append(time.perf_counter())
+        await asyncio.sleep(0.001)
+
+async def run(api, storage, requests, concurrency):
+    """Return (requests per second, worst loop stall in ms)"""
+    if api == "sync":
+        boards, teams = ProjectBoard(storage=storage), Team(storage=storage)
+        async def call(method, request):
+            return method(request)
+    else:
+        boards, teams = AsyncProjectBoard(storage=storage), AsyncTeam(storage=storage)
+        async def call(method, request):
+            return await method(request)
+
+    queue = iter(range(requests))
+    async def client(worker):
+        for n in queue:
+            await call(boards.add_task, json.dumps({
+                "title": f"{api} {concurrency} {n}",
+                "description": "Benchmark task",
+                "user_id": "user_1",
+                "board_id": "board_1"
+            }))
+            await call(boards.list_boards, json.dumps({"id": "team_1"}))
+            await call(teams.list_team_users, json.dumps({"id": "team_1"}))
+
+    ticks = []
+    beat = asyncio.ensure_future(heartbeat(ticks))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(w) for w in range(concurrency)))
+    end = time.perf_counter()
+    beat.cancel()
+    # A blocked loop shows up as a long gap between two heartbeats
+    ticks.append(end)
+    stall = max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+    return requests / (end - start), stall * 1000
+
+async def bench(requests, backend):
+    """Print both APIs side by side for growing concurrency"""
+    for concurrency in (1, 10, 100):
+        for api in ("sync", "async"):
+            throughput, stall = await run(api, setup(backend), requests, concurrency)
+            print(f"  {api:5} concurrency {concurrency:3}: {throughput:8.1f} requests/s, "
+                  f"worst loop stall {stall:7.1f} ms")
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    backend = sys.argv[2] if len(sys.argv) > 2 else "journal"
+
+    print("=" * 50)
+    print("BENCHMARK: ASYNC API")
+    print("=" * 50)
+    print(f"\n{backend} backend, {requests} requests per run")
+
+    asyncio.run(bench(requests, backend))
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark for several processes writing to the same db folder
+
+Every worker process opens its own storage over a shared temporary db
+folder and adds tasks to the same board. Afterwards the tasks are counted
+to make sure no write was lost to a concurrent one.
+
+To run: python -m planner.bench_concurrency [tasks per worker]
+"""
+
+from planner.project_board import ProjectBoard
+from planner.storage import BACKENDS, open_storage
+from planner.team import Team
+from planner.user import User
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+
+def setup(db_folder, backend):
+    """Create the user, team and board every worker writes to"""
+    storage = open_storage(db_folder, backend)
+    User(storage=storage).create_user(json.dumps({"name": "bench_user", "display_name": "Bench User"}))
+    Team(storage=storage).create_team(json.dumps({
+        "name": "bench_team", "description": "Benchmark team", "admin": "user_1"}))
+    ProjectBoard(storage=storage).create_board(json.dumps({
+        "name": "bench_board", "description": "Benchmark board", "team_id": "team_1"}))
+
+def worker(db_folder, backend, worker_id, tasks):
+    """Add tasks to the shared board from a separate process"""
+    board_manager = ProjectBoard(storage=open_storage(db_folder, backend))
+    for i in range(tasks):
+        board_manager.add_task(json.dumps({
+            "title": f"Task {worker_id}-{i}",
+            "description": "Benchmark task",
+            "user_id": "user_1",
+            "board_id": "board_1"
+        }))
+
+def run(backend, workers, tasks):
+    """Return (tasks per second, tasks stored) for one configuration"""
+    db_folder = tempfile.mkdtemp(prefix="planner_bench_")
+    setup(db_folder, backend)
+
+    processes = [multiprocessing.Process(target=worker, args=(db_folder, backend, w, tasks))
+                 for w in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    stored = open_storage(db_folder, backend).count("tasks")
+    return workers * tasks / elapsed, stored
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print("=" * 50)
+    print("BENCHMARK: CONCURRENT WRITERS")
+    print("=" * 50)
+
+    for backend in BACKENDS:
+        print(f"\n{backend} backend, {tasks} add_task calls per worker")
+        for workers in (1, 2, 4, 8):
+            throughput, stored = run(backend, workers, tasks)
+            mark = "✓" if stored == workers * tasks else "✗"
+            print(f"{mark} {workers} workers: {throughput:8.1f} tasks/s, "
+                  f"{stored}/{workers * tasks} tasks stored")
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of exporting every board, one export_board call at a time versus
+one export_boards call over a growing pool of worker processes
+
+To run: python -m planner.bench_export [boards] [tasks per board] [backend]
+"""
+
+from planner.project_board import ProjectBoard
+from planner.storage import open_storage
+from planner.team import Team
+from planner.user import User
+import json
+import os
+import sys
+import tempfile
+import time
+
+def setup(boards, tasks, backend):
+    """Create a team of 10 users with the given number of boards and tasks"""
+    storage = open_storage(tempfile.mkdtemp(prefix="planner_bench_"), backend)
+    User(storage=storage).import_users(
+        {"name": f"bench_user_{i}", "display_name": f"Bench User {i}"} for i in range(10))
+    team_manager = Team(storage=storage)
+    team_manager.create_team(json.dumps({
+        "name": "bench_team", "description": "Benchmark team", "admin": "user_1"}))
+    team_manager.add_users_to_team(json.dumps({"id": "team_1", "users": [f"user_{i}" for i in range(2, 11)]}))
+
+    board_manager = ProjectBoard(storage=storage)
+    for b in range(boards):
+        board = json.loads(board_manager.create_board(json.dumps({
+            "name": f"bench_board_{b}", "description": "Benchmark board", "team_id": "team_1"})))
+        board_manager.add_tasks(json.dumps({"tasks": [{
+            "title": f"Task {t}",
+            "description": "Benchmark task",
+            "user_id": f"user_{t % 10 + 1}",
+            "board_id": board["id"]
+        } for t in range(tasks)]}))
+    return board_manager
+
+def timed(call):
+    """Return how long call() took in seconds"""
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+def main():
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    tasks = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    backend = sys.argv[3] if len(sys.argv) > 3 else "journal"
+
+    print("=" * 50)
+    print("BENCHMARK: EXPORTING EVERY BOARD")
+    print("=" * 50)
+    print(f"\n{backend} backend, {boards} boards of {tasks} tasks, {os.cpu_count()} cores")
+
+    board_manager = setup(boards, tasks, backend)
+    board_ids = [board_id for board_id, _ in board_manager.storage.scan("boards")]
+
+    elapsed = timed(lambda: [board_manager.export_board(json.dumps({"id": board_id})) for board_id in board_ids])
+    print(f"  export_board loop      : {elapsed:6.2f}s")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        elapsed = timed(lambda: board_manager.export_boards(json.dumps({"workers": workers})))
+        print(f"  export_boards {workers:2} workers: {elapsed:6.2f}s")
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
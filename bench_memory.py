@@ -0,0 +1,106 @@
+"""
+Benchmark of the memory taken by a loaded db folder, with a dict per record
+versus the compact tables of compact_store.py
+
+Writes the snapshot files of a synthetic db folder (1,000,000 tasks by
+default, over 1,000 boards of 100 teams of 10 users), then loads every
+collection in a fresh storage in each mode and reports the memory it
+holds, traced with tracemalloc, before and after the indexes are built.
+Reads are then timed on another storage, without tracing.
+
+To run: python -m planner.bench_memory [tasks]
+"""
+
+from planner.storage import JsonStorage
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+STATUSES = ["OPEN", "IN_PROGRESS", "COMPLETE"]
+
+def setup(tasks, teams=100, boards=1000, team_size=10):
+    """Write the snapshot files of a synthetic db folder"""
+    db_folder = tempfile.mkdtemp(prefix="planner_bench_")
+    created = "2024-01-01 09:00:00"
+    collections = {
+        "users": {f"user_{u}": {"name": f"user_{u}", "display_name": f"User {u}", "creation_time": created}
+                  for u in range(1, teams * team_size + 1)},
+        "teams": {f"team_{t}": {"name": f"team_{t}", "description": "Benchmark team",
+                                "creation_time": created, "admin": f"user_{(t - 1) * team_size + 1}"}
+                  for t in range(1, teams + 1)},
+        "team_members": {f"team_{t}": [f"user_{(t - 1) * team_size + m}" for m in range(1, team_size + 1)]
+                         for t in range(1, teams + 1)},
+        "user_teams": {f"user_{u}": [f"team_{(u - 1) // team_size + 1}"] for u in range(1, teams * team_size + 1)},
+        "boards": {f"board_{b}": {"name": f"board_{b}", "description": "Benchmark board",
+                                  "team_id": f"team_{b % teams + 1}", "creation_time": created,
+                                  "status": "OPEN", "end_time": None}
+                   for b in range(1, boards + 1)},
+        "tasks": {f"task_{t}": {"title": f"Task {t}", "description": f"Benchmark task number {t}",
+                                "user_id": f"user_{t % (teams * team_size) + 1}",
+                                "board_id": f"board_{t % boards + 1}",
+                                # Tasks added in bulk share the second they were created in
+                                "creation_time": f"2024-01-{t // 100000 + 1:02d} 10:{t // 1000 % 60:02d}:00",
+                                "status": STATUSES[t % 3]}
+                  for t in range(1, tasks + 1)},
+    }
+    for collection, data in collections.items():
+        with open(os.path.join(db_folder, f"{collection}.json"), 'w') as f:
+            json.dump(data, f, separators=(",", ":"))
+    return db_folder
+
+def measure(db_folder, compact_records):
+    """Return the bytes held after loading every collection, and after indexing tasks and boards"""
+    gc.collect()
+    tracemalloc.start()
+    storage = JsonStorage(db_folder, compact_records=compact_records)
+    for collection in ("users", "teams", "team_members", "user_teams", "boards", "tasks"):
+        storage.count(collection)
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    for collection in ("boards", "tasks"):
+        storage.page(collection, 1)
+    gc.collect()
+    indexed, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held, indexed
+
+def time_reads(db_folder, compact_records):
+    """Return the seconds taken to tally and to filter 100 boards"""
+    storage = JsonStorage(db_folder, compact_records=compact_records)
+    storage.page("tasks", 1)
+    start = time.perf_counter()
+    for b in range(1, 101):
+        storage.tally("tasks", "status", board_id=f"board_{b}")
+    tally_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for b in range(1, 101):
+        list(storage.filter("tasks", board_id=f"board_{b}", status="OPEN"))
+    filter_time = time.perf_counter() - start
+    return tally_time, filter_time
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    print("=" * 50)
+    print("BENCHMARK: IN-MEMORY RECORD LAYOUT")
+    print("=" * 50)
+
+    db_folder = setup(tasks)
+    print(f"\n{tasks} tasks, memory held after loading every collection")
+    for label, compact_records in (("dicts", False), ("compact", True)):
+        held, indexed = measure(db_folder, compact_records)
+        tally_time, filter_time = time_reads(db_folder, compact_records)
+        print(f"  {label:7}: {held / 1e6:7.1f} MB ({held / tasks:4.0f} bytes per task), "
+              f"{indexed / 1e6:7.1f} MB with indexes ({indexed / tasks:4.0f} bytes per task)")
+        print(f"  {'':7}  100 board tallies {tally_time:6.3f}s, 100 board filters {filter_time:6.3f}s")
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of cold-loading a db folder from JSON versus binary snapshots
+
+Writes a board with the given number of tasks, converts the db folder to
+binary snapshots, then times a fresh storage loading every task in each
+format and compares the file sizes.
+
+To run: python -m planner.bench_snapshot [tasks]
+"""
+
+from planner.project_board import ProjectBoard
+from planner.storage import JsonStorage, convert_snapshots
+from planner.team import Team
+from planner.user import User
+import json
+import os
+import sys
+import tempfile
+import time
+
+def setup(tasks):
+    """Create a db folder with one board of the given number of tasks"""
+    db_folder = tempfile.mkdtemp(prefix="planner_bench_")
+    storage = JsonStorage(db_folder)
+    User(storage=storage).import_users(
+        {"name": f"bench_user_{i}", "display_name": f"Bench User {i}"} for i in range(50))
+    team_manager = Team(storage=storage)
+    team_manager.create_team(json.dumps({
+        "name": "bench_team", "description": "Benchmark team", "admin": "user_1"}))
+    team_manager.add_users_to_team(json.dumps({"id": "team_1", "users": [f"user_{i}" for i in range(2, 51)]}))
+    board_manager = ProjectBoard(storage=storage)
+    board_manager.create_board(json.dumps({
+        "name": "bench_board", "description": "Benchmark board", "team_id": "team_1"}))
+    for start in range(0, tasks, 10000):
+        board_manager.add_tasks(json.dumps({"tasks": [{
+            "title": f"Task {t}",
+            "description": f"Benchmark task number {t}",
+            "user_id": f"user_{t % 50 + 1}",
+            "board_id": "board_1"
+        } for t in range(start, min(start + 10000, tasks))]}))
+    return db_folder
+
+def cold_load(db_folder, snapshot_format):
+    """Return the seconds a fresh storage takes to load every task"""
+    start = time.perf_counter()
+    JsonStorage(db_folder, snapshot_format=snapshot_format).count("tasks")
+    return time.perf_counter() - start
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    print("=" * 50)
+    print("BENCHMARK: SNAPSHOT FORMATS")
+    print("=" * 50)
+
+    db_folder = setup(tasks)
+    convert_snapshots(db_folder, "binary")
+    print(f"\n{tasks} tasks")
+    for snapshot_format, extension in JsonStorage.SNAPSHOT_FORMATS.items():
+        size = os.path.getsize(os.path.join(db_folder, "tasks" + extension))
+        elapsed = min(cold_load(db_folder, snapshot_format) for _ in range(3))
+        print(f"  {snapshot_format:6}: tasks{extension:5} {size / 1e6:6.1f} MB, cold load {elapsed:6.3f}s")
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Compact in-memory form of the large collections.
+
+A dict per task holds six keys and six value pointers in a hash table of
+its own, and every task repeats strings such as "OPEN" or "board_12".
+RecordTable keeps a collection as parallel columns instead: one row per
+record, free text (titles, descriptions) in plain lists, ids and
+timestamps as u32 codes into a table of interned strings shared by the
+whole storage, and statuses as one-byte codes. Rows are found by the
+integer surrogate of the record's id (see SurrogateKeys) rather than by
+the id string. ListTable does the same for the membership lists, which
+become arrays of codes.
+
+Both are mappings from id to record, so the storage uses them in place of
+a dict. Reading a record builds a new dict (or list); records are values
+that are replaced with put(), never changed in place, so nothing is lost.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from .storage_base import SurrogateKeys
+
+# Column kinds: the value itself, a code into the shared string table, or a
+# code into a small table of the column's own
+TEXT, SYMBOL, ENUM = 0, 1, 2
+
+# collection -> (field, kind) in the order the managers build records
+RECORD_LAYOUTS = {
+    "tasks": [("title", TEXT), ("description", TEXT), ("user_id", SYMBOL), ("board_id", SYMBOL),
+              ("creation_time", SYMBOL), ("status", ENUM)],
+    "boards": [("name", TEXT), ("description", TEXT), ("team_id", SYMBOL), ("creation_time", SYMBOL),
+               ("status", ENUM), ("end_time", SYMBOL)],
+    "teams": [("name", TEXT), ("description", TEXT), ("creation_time", SYMBOL), ("admin", SYMBOL)],
+}
+
+# Collections of id -> list of ids, and the collection their keys are ids of
+LIST_COLLECTIONS = {"team_members": "teams", "user_teams": "users"}
+
+_absent = object()
+
+
+class Symbols:
+    """Interned values and their codes; codes are never reused"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        """Return the code of a hashable value, assigning one if needed"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class RecordTable(MutableMapping):
+    """A collection of records stored as one column per field"""
+
+    def __init__(self, layout, symbols: Symbols, keys: SurrogateKeys, data: Optional[Dict[str, Any]] = None):
+        self._keys = keys
+        self._fields = [field for field, _ in layout]
+        self._field_set = set(self._fields)
+        self._tables: List[Optional[Symbols]] = []
+        self._columns: List[Any] = []
+        for _, kind in layout:
+            if kind == TEXT:
+                self._tables.append(None)
+                self._columns.append([])
+            else:
+                self._tables.append(symbols if kind == SYMBOL else Symbols())
+                self._columns.append(array('I' if kind == SYMBOL else 'B'))
+        # surrogate of the id -> row
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        # Rows lacking one of the layout's fields
+        self._sparse = set()
+        # row -> fields outside the layout, or non-string values of coded fields
+        self._extra: Dict[int, Dict[str, Any]] = {}
+        self._slots = self._make_slots()
+        for key, record in (data or {}).items():
+            self[key] = record
+
+    def _make_slots(self) -> list:
+        """Return (field, column, decoded values or None) of every column, for reads"""
+        return [(field, column, None if table is None else table.values)
+                for field, column, table in zip(self._fields, self._columns, self._tables)]
+
+    def _store(self, position: int, row: int, value: Any) -> Optional[Any]:
+        """Write one field of a row; returns the value if it doesn't fit its column"""
+        column, table = self._columns[position], self._tables[position]
+        if table is not None:
+            # Only strings are coded, so 1 and True never share a code
+            if not (value is None or value is _absent or isinstance(value, str)):
+                column[row] = table.code(_absent)
+                return value
+            value = table.code(value)
+            if value > 0xFF and column.typecode == 'B':
+                column = self._columns[position] = array('I', column)
+                self._slots = self._make_slots()
+        column[row] = value
+        return None
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        number = self._keys.lookup(key)
+        if number not in self._rows:
+            raise KeyError(key)
+        return self.by_number(number)
+
+    def by_number(self, number: int) -> Dict[str, Any]:
+        """Return the record of the id a surrogate number stands for"""
+        row = self._rows[number]
+        record = {field: column[row] if values is None else values[column[row]]
+                  for field, column, values in self._slots}
+        if row in self._sparse:
+            record = {field: value for field, value in record.items() if value is not _absent}
+        extra = self._extra.get(row)
+        if extra:
+            record.update(extra)
+        return record
+
+    def __setitem__(self, key: str, record: Dict[str, Any]) -> None:
+        number = self._keys.number(key)
+        row = self._rows.get(number)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._columns[0]) if self._columns else 0
+                for column, table in zip(self._columns, self._tables):
+                    column.append(_absent if table is None else table.code(_absent))
+            self._rows[number] = row
+
+        extra = {field: value for field, value in record.items() if field not in self._field_set}
+        sparse = False
+        for position, field in enumerate(self._fields):
+            value = record.get(field, _absent)
+            sparse = sparse or value is _absent
+            misfit = self._store(position, row, value)
+            if misfit is not None:
+                extra[field] = misfit
+        if sparse:
+            self._sparse.add(row)
+        else:
+            self._sparse.discard(row)
+        if extra:
+            self._extra[row] = extra
+        else:
+            self._extra.pop(row, None)
+
+    def __delitem__(self, key: str) -> None:
+        row = self._rows.pop(self._keys.lookup(key), None)
+        if row is None:
+            raise KeyError(key)
+        self._extra.pop(row, None)
+        self._sparse.discard(row)
+        # Drop the free text now; coded columns are overwritten on reuse
+        for column, table in zip(self._columns, self._tables):
+            if table is None:
+                column[row] = _absent
+        self._free.append(row)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._keys.lookup(key) in self._rows
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self._keys.key, self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+class ListTable(MutableMapping):
+    """A collection of id lists stored as arrays of codes"""
+
+    def __init__(self, symbols: Symbols, keys: SurrogateKeys, data: Optional[Dict[str, Any]] = None):
+        self._symbols = symbols
+        self._keys = keys
+        # surrogate of the id -> codes of the listed ids
+        self._lists: Dict[int, Any] = {}
+        for key, value in (data or {}).items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        codes = self._lists.get(self._keys.lookup(key), _absent)
+        if codes is _absent:
+            raise KeyError(key)
+        if not isinstance(codes, array):
+            return codes
+        values = self._symbols.values
+        return [values[code] for code in codes]
+
+    def slice(self, key: str, start: int, stop: int) -> list:
+        """Return the ids at positions start to stop of a list, decoding only those"""
+        codes = self._lists.get(self._keys.lookup(key), [])
+        if not isinstance(codes, array):
+            return codes[start:stop] if isinstance(codes, list) else []
+        values = self._symbols.values
+        return [values[code] for code in codes[start:stop]]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        number = self._keys.number(key)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            self._lists[number] = array('I', map(self._symbols.code, value))
+        else:
+            # Entries of an older shape are kept as they are
+            self._lists[number] = value
+
+    def __delitem__(self, key: str) -> None:
+        if self._lists.pop(self._keys.lookup(key), _absent) is _absent:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._keys.lookup(key) in self._lists
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self._keys.key, self._lists)
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+
+def compact(collection: str, data: Dict[str, Any], symbols: Symbols,
+            surrogates: Dict[str, SurrogateKeys]) -> MutableMapping:
+    """Return a compact table holding the records of a collection, given the surrogate keys of each collection"""
+    if collection in RECORD_LAYOUTS:
+        return RecordTable(RECORD_LAYOUTS[collection], symbols, surrogates[collection], data)
+    if collection in LIST_COLLECTIONS:
+        return ListTable(symbols, surrogates[LIST_COLLECTIONS[collection]], data)
+    raise KeyError(f"Collection '{collection}' has no compact form")
@@ -0,0 +1,179 @@
+import json
+import os
+from typing import Iterator, List, Optional, Tuple
+
+
+class Journal:
+    """
+    Append-only write-ahead log for the db folder.
+
+    Each flush of the storage engine appends one compact JSON line holding
+    every operation of that API call, e.g.
+    {"ops": [["put", "tasks", "task_7", {...}]]}
+    Replaying the lines on top of the snapshot files restores the latest
+    state. Every append is fsynced before the call returns, so a committed
+    call survives a power failure. A torn final line (crash mid-append) is
+    ignored on replay.
+
+    The journal remembers how far into the active file it has read, so
+    records appended by other processes can be picked up incrementally.
+    Every journal file starts with a random epoch line, which tells a
+    reader that the file was replaced by a compaction even when the file
+    system hands the new file the inode of the old one.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 4 * 1024 * 1024, max_records: int = 10000):
+        """Open the journal at path; compaction is due past either threshold"""
+        self.path = path
+        self.rotated_path = path + ".1"
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.records = 0
+        self.size = 0
+        # Bytes of the active file applied so far, and which file that was
+        self.offset = 0
+        self.inode: Optional[int] = None
+        self.epoch: Optional[str] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Return (inode, size) of the active file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size)
+
+    def _epoch(self) -> Optional[str]:
+        """Return the epoch written at the start of the active file"""
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+        except (FileNotFoundError, ValueError):
+            return None
+        return header.get("epoch")
+
+    def _start(self) -> None:
+        """Begin a new active file holding only a fresh epoch line"""
+        self.epoch = os.urandom(8).hex()
+        header = (json.dumps({"epoch": self.epoch}) + "\n").encode("utf-8")
+        with open(self.path, 'wb') as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+            self.inode = os.fstat(f.fileno()).st_ino
+        self.size += len(header)
+
+    def append(self, ops: List[list]) -> None:
+        """Append one record holding the operations of a single mutation"""
+        line = (json.dumps({"ops": ops}, separators=(",", ":")) + "\n").encode("utf-8")
+        if self.offset == 0:
+            self._start()
+        with open(self.path, 'ab') as f:
+            f.write(line)
+            # The call is committed once its line is on disk, as durable as
+            # a snapshot write
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+            self.inode = os.fstat(f.fileno()).st_ino
+        self.records += 1
+        self.size += len(line)
+
+    def _read(self, path: str, offset: int = 0) -> Iterator[Tuple[Optional[List[list]], int]]:
+        """Yield (ops, end offset) of every complete line after offset; ops is None for the epoch line"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write at the tail, or an append still in progress
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                yield record.get("ops"), offset
+
+    def replay(self) -> Iterator[List[list]]:
+        """Yield every record, oldest first, counting what is pending compaction"""
+        self.records = 0
+        self.size = 0
+        self.offset = 0
+        stat = self._stat()
+        self.inode = stat[0] if stat else None
+        self.epoch = self._epoch()
+
+        if os.path.exists(self.rotated_path):
+            self.size += os.path.getsize(self.rotated_path)
+            for ops, _ in self._read(self.rotated_path):
+                if ops is not None:
+                    self.records += 1
+                    yield ops
+
+        for ops, end in self._read(self.path):
+            self.offset = end
+            if ops is not None:
+                self.records += 1
+                yield ops
+        self.size += self.offset
+
+    def changes(self) -> str:
+        """
+        Compare the active file with what has been read so far:
+        "none" if nothing changed, "tail" if records were appended, or
+        "reset" if the file was rotated by a compaction and everything has
+        to be reloaded.
+        """
+        stat = self._stat()
+        if stat is None:
+            if self.inode is None and not os.path.exists(self.rotated_path):
+                return "none"
+            return "reset"
+        inode, size = stat
+        if inode != self.inode or size < self.offset or self._epoch() != self.epoch:
+            return "reset"
+        return "tail" if size > self.offset else "none"
+
+    def read_tail(self) -> List[List[list]]:
+        """Return the records appended since the last read or append"""
+        records = []
+        for ops, end in self._read(self.path, self.offset):
+            self.size += end - self.offset
+            self.offset = end
+            if ops is not None:
+                self.records += 1
+                records.append(ops)
+        return records
+
+    def truncate_tail(self) -> None:
+        """Cut off a torn record so the next append starts on a clean line"""
+        stat = self._stat()
+        if stat is not None and stat[0] == self.inode and stat[1] > self.offset:
+            os.truncate(self.path, self.offset)
+
+    def should_compact(self) -> bool:
+        """Check whether the journal grew past its size or record threshold"""
+        return self.size >= self.max_bytes or self.records >= self.max_records
+
+    def rotate(self) -> None:
+        """Move the active journal aside so new appends start a fresh file"""
+        if os.path.exists(self.rotated_path):
+            # A previous compaction never finished, keep its records too
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as src, open(self.rotated_path, 'ab') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+        elif os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+        self.records = 0
+        self.size = 0
+        # A new epoch tells every other process that a compaction happened
+        self._start()
+
+    def discard_rotated(self) -> None:
+        """Drop the rotated journal once its records are in the snapshots"""
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
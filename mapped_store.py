@@ -0,0 +1,222 @@
+"""
+Memory-mapped record file for large collections.
+
+The file starts with b"PLNM" and a version byte, followed by records:
+
+    kind (u8), key length (u16), value length (u32), key, value
+
+where kind is PUT (value is the record as compact JSON), DELETE (no value)
+or COMMIT (no key or value). Records after the last COMMIT are a write that
+was cut short by a crash and are ignored. The file is only ever appended
+to, or replaced as a whole by a rewrite that drops superseded records, so a
+process reading through an older mapping always sees complete records.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Tuple
+
+MAGIC = b"PLNM\x01"
+
+HEADER = struct.Struct("<BHI")
+PUT, DELETE, COMMIT = 1, 2, 3
+
+# Rewrite the file once superseded records take more space than this and
+# than the live ones
+MIN_REWRITE_BYTES = 1 << 20
+
+_deleted = object()
+
+
+class MappedStore(MutableMapping):
+    """
+    A collection (id -> record) kept in a memory-mapped file and decoded
+    only when a record is read.
+
+    Opening the file walks the record headers to build an offset index of
+    id -> (position, length), without decoding any record. Reads decode one
+    record from the mapping, so they cost the same however large the
+    collection is. Changes are held in memory until checkpoint() appends
+    them to the file; the journal keeps them durable in the meantime.
+    """
+
+    def __init__(self, path: str):
+        """Open the record file at path, creating it if needed"""
+        self.path = path
+        self._guard = threading.RLock()
+        # key -> (value position, value length) of the committed records
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        # key -> record (or _deleted) changed since the last checkpoint
+        self._changes: Dict[str, Any] = {}
+        self._count = 0
+        self._map = None
+        self._end = len(MAGIC)
+        self._live_bytes = 0
+
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+        self._open()
+
+    @classmethod
+    def create(cls, path: str, data: Dict[str, Any]) -> "MappedStore":
+        """Write a new record file holding the given collection"""
+        with open(path + ".tmp", 'wb') as f:
+            f.write(MAGIC)
+            for key, value in data.items():
+                f.write(_encode(PUT, key, value))
+            f.write(HEADER.pack(COMMIT, 0, 0))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        return cls(path)
+
+    def _open(self) -> None:
+        """Map the file and index its committed records"""
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{self.path}' is not a mapped record file")
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > len(MAGIC) else None
+
+        offsets: Dict[str, Tuple[int, int]] = {}
+        pending: Dict[str, Any] = {}
+        position = committed = len(MAGIC)
+        while position + HEADER.size <= size:
+            kind, key_length, value_length = HEADER.unpack_from(self._map, position)
+            start = position + HEADER.size
+            end = start + key_length + value_length
+            if kind not in (PUT, DELETE, COMMIT) or end > size:
+                break
+            if kind == COMMIT:
+                for key, offset in pending.items():
+                    if offset is None:
+                        offsets.pop(key, None)
+                    else:
+                        offsets[key] = offset
+                pending = {}
+                committed = end
+            else:
+                key = self._map[start:start + key_length].decode("utf-8")
+                pending[key] = (start + key_length, value_length) if kind == PUT else None
+            position = end
+
+        self._offsets = offsets
+        self._count = len(offsets)
+        self._end = committed
+        self._live_bytes = sum(length for _, length in offsets.values())
+
+    def __getitem__(self, key: str) -> Any:
+        with self._guard:
+            if key in self._changes:
+                value = self._changes[key]
+                if value is _deleted:
+                    raise KeyError(key)
+                return value
+            position, length = self._offsets[key]
+            return json.loads(self._map[position:position + length])
+
+    def __contains__(self, key: object) -> bool:
+        with self._guard:
+            if key in self._changes:
+                return self._changes[key] is not _deleted
+            return key in self._offsets
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._guard:
+            if key not in self:
+                self._count += 1
+            self._changes[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        with self._guard:
+            if key not in self:
+                raise KeyError(key)
+            self._count -= 1
+            self._changes[key] = _deleted
+
+    def __iter__(self) -> Iterator[str]:
+        with self._guard:
+            keys = [key for key in self._offsets if self._changes.get(key) is not _deleted]
+            keys.extend(key for key, value in self._changes.items()
+                        if value is not _deleted and key not in self._offsets)
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def checkpoint(self) -> None:
+        """
+        Append the changes made since the last checkpoint and commit them.
+        Callers hold the exclusive lock of the db folder.
+        """
+        with self._guard:
+            if not self._changes:
+                return
+            with open(self.path, 'r+b') as f:
+                # Drop the tail of a checkpoint that crashed half way
+                f.truncate(self._end)
+                f.seek(self._end)
+                written: Dict[str, Any] = {}
+                position = self._end
+                for key, value in self._changes.items():
+                    if value is _deleted:
+                        if key in self._offsets:
+                            record = _encode(DELETE, key, None)
+                            f.write(record)
+                            written[key] = None
+                            position += len(record)
+                        continue
+                    record = _encode(PUT, key, value)
+                    f.write(record)
+                    value_length = len(record) - HEADER.size - len(key.encode("utf-8"))
+                    written[key] = (position + len(record) - value_length, value_length)
+                    position += len(record)
+                f.write(HEADER.pack(COMMIT, 0, 0))
+                f.flush()
+                os.fsync(f.fileno())
+                self._end = position + HEADER.size
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            for key, offset in written.items():
+                if key in self._offsets:
+                    self._live_bytes -= self._offsets[key][1]
+                if offset is None:
+                    del self._offsets[key]
+                else:
+                    self._offsets[key] = offset
+                    self._live_bytes += offset[1]
+            self._changes = {}
+
+            dead_bytes = self._end - self._live_bytes
+            if dead_bytes > MIN_REWRITE_BYTES and dead_bytes > self._live_bytes:
+                self._rewrite()
+
+    def _rewrite(self) -> None:
+        """Replace the file with one holding only the live records"""
+        with open(self.path + ".tmp", 'wb') as f:
+            f.write(MAGIC)
+            for key, (position, length) in self._offsets.items():
+                encoded_key = key.encode("utf-8")
+                f.write(HEADER.pack(PUT, len(encoded_key), length))
+                f.write(encoded_key)
+                f.write(self._map[position:position + length])
+            f.write(HEADER.pack(COMMIT, 0, 0))
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers in other processes keep their mapping of the old file
+        os.replace(self.path + ".tmp", self.path)
+        self._open()
+
+
+def _encode(kind: int, key: str, value: Any) -> bytes:
+    """Encode one PUT or DELETE record"""
+    encoded_key = key.encode("utf-8")
+    encoded_value = b"" if kind == DELETE else json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(kind, len(encoded_key), len(encoded_value)) + encoded_key + encoded_value
@@ -1,108 +1,54 @@
 import json
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from .project_board_base import ProjectBoardBase
+from .storage import get_storage
+from .storage_base import page_request, transactional
+
+# Write buffer of export_board; large boards are written in chunks this size
+EXPORT_BUFFER_SIZE = 1 << 16
+
+# Parts of a board report that export_board caches and versions separately
+REPORT_SECTIONS = ["header", "OPEN", "IN_PROGRESS", "COMPLETE"]
 
 
 class ProjectBoard(ProjectBoardBase):
     """
     Concrete implementation of ProjectBoardBase for managing boards and tasks.
-    Uses JSON file storage in the db folder.
+    Uses the shared storage engine over the db folder.
     """
     
-    def __init__(self):
+    def __init__(self, storage=None, backend="json"):
         """Initialize the ProjectBoard class"""
-        self.db_folder = "db"
         self.out_folder = "out"
-        self.boards_file = os.path.join(self.db_folder, "boards.json")
-        self.tasks_file = os.path.join(self.db_folder, "tasks.json")
-        self.teams_file = os.path.join(self.db_folder, "teams.json")
-        self.users_file = os.path.join(self.db_folder, "users.json")
-        self.team_members_file = os.path.join(self.db_folder, "team_members.json")
-        
-        # Create folders if they don't exist
-        if not os.path.exists(self.db_folder):
-            os.makedirs(self.db_folder)
+        self.storage = storage or get_storage("db", backend)
+        self.db_folder = self.storage.db_folder
+        
+        # Create out folder if it doesn't exist
         if not os.path.exists(self.out_folder):
             os.makedirs(self.out_folder)
-        
-        self._initialize_files()
-    
-    def _initialize_files(self):
-        """Create empty JSON files if they don't exist"""
-        if not os.path.exists(self.boards_file):
-            with open(self.boards_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.tasks_file):
-            with open(self.tasks_file, 'w') as f:
-                json.dump({}, f)
-    
-    def _load_boards(self):
-        """Load all boards from JSON file"""
-        with open(self.boards_file, 'r') as f:
-            return json.load(f)
-    
-    def _save_boards(self, boards):
-        """Save boards to JSON file"""
-        with open(self.boards_file, 'w') as f:
-            json.dump(boards, f, indent=2)
     
-    def _load_tasks(self):
-        """Load all tasks from JSON file"""
-        with open(self.tasks_file, 'r') as f:
-            return json.load(f)
+    def _generate_board_id(self):
+        """Generate a unique board ID from the persisted sequence"""
+        return self.storage.next_id("boards")
     
-    def _save_tasks(self, tasks):
-        """Save tasks to JSON file"""
-        with open(self.tasks_file, 'w') as f:
-            json.dump(tasks, f, indent=2)
-    
-    def _load_teams(self):
-        """Load teams to verify they exist"""
-        if not os.path.exists(self.teams_file):
-            return {}
-        with open(self.teams_file, 'r') as f:
-            return json.load(f)
-    
-    def _load_users(self):
-        """Load users to verify they exist"""
-        if not os.path.exists(self.users_file):
-            return {}
-        with open(self.users_file, 'r') as f:
-            return json.load(f)
-    
-    def _load_team_members(self):
-        """Load team members"""
-        if not os.path.exists(self.team_members_file):
-            return {}
-        with open(self.team_members_file, 'r') as f:
-            return json.load(f)
-    
-    def _generate_board_id(self, boards):
-        """Generate a unique board ID"""
-        if not boards:
-            return "board_1"
-        
-        max_num = 0
-        for board_id in boards.keys():
-            num = int(board_id.split('_')[1])
-            max_num = max(max_num, num)
-        
-        return f"board_{max_num + 1}"
+    def _touch_board(self, board_id, *sections):
+        """
+        Bump the export versions of the report sections a change affects
+        (see REPORT_SECTIONS); callers hold the board's lock
+        """
+        for section in set(sections):
+            key = f"{board_id}:{section}"
+            self.storage.put("sequences", key, self.storage.get("sequences", key, 0) + 1)
     
-    def _generate_task_id(self, tasks):
-        """Generate a unique task ID"""
-        if not tasks:
-            return "task_1"
-        
-        max_num = 0
-        for task_id in tasks.keys():
-            num = int(task_id.split('_')[1])
-            max_num = max(max_num, num)
-        
-        return f"task_{max_num + 1}"
+    def _generate_task_id(self):
+        """Generate a unique task ID from the persisted sequence"""
+        return self.storage.next_id("tasks")
     
+    @transactional
     def create_board(self, request: str):
         """
         Create a new project board for a team
@@ -135,17 +81,15 @@ class ProjectBoard(ProjectBoardBase):
             if len(description) > 128:
                 raise ValueError("Description cannot exceed 128 characters")
             
-            teams = self._load_teams()
-            if team_id not in teams:
-                raise ValueError(f"Team with ID '{team_id}' does not exist")
+            self.storage.lock(("board_names", team_id, name))
             
-            boards = self._load_boards()
+            if not self.storage.contains("teams", team_id):
+                raise ValueError(f"Team with ID '{team_id}' does not exist")
             
-            for board_id, board_data in boards.items():
-                if board_data["team_id"] == team_id and board_data["name"] == name:
-                    raise ValueError(f"Board with name '{name}' already exists for this team")
+            if self.storage.find("boards", team_id=team_id, name=name) is not None:
+                raise ValueError(f"Board with name '{name}' already exists for this team")
             
-            board_id = self._generate_board_id(boards)
+            board_id = self._generate_board_id()
             
             board_data = {
                 "name": name,
@@ -156,8 +100,7 @@ class ProjectBoard(ProjectBoardBase):
                 "end_time": None
             }
             
-            boards[board_id] = board_data
-            self._save_boards(boards)
+            self.storage.put("boards", board_id, board_data)
             
             return json.dumps({"id": board_id})
         
@@ -166,6 +109,7 @@ class ProjectBoard(ProjectBoardBase):
         except Exception as e:
             raise Exception(f"Error creating board: {str(e)}")
     
+    @transactional
     def close_board(self, request: str) -> str:
         """
         Close a board (only if all tasks are COMPLETE)
@@ -182,20 +126,25 @@ class ProjectBoard(ProjectBoardBase):
             if not board_id:
                 raise ValueError("Board ID is required")
             
-            boards = self._load_boards()
+            # Tasks can't be added or moved while the board is being closed
+            self.storage.lock(("boards", board_id))
+            board_data = self.storage.get("boards", board_id)
             
-            if board_id not in boards:
+            if board_data is None:
                 raise ValueError(f"Board with ID '{board_id}' not found")
             
-            tasks = self._load_tasks()
-            for task_id, task_data in tasks.items():
-                if task_data["board_id"] == board_id:
+            counts = self.storage.tally("tasks", "status", board_id=board_id)
+            if any(count for status, count in counts.items() if status != "COMPLETE"):
+                # Only the failure path looks at the board's tasks, to name one
+                for task_id, task_data in self.storage.filter("tasks", board_id=board_id):
                     if task_data["status"] != "COMPLETE":
                         raise ValueError(f"Cannot close board. Task '{task_data['title']}' is not COMPLETE")
             
-            boards[board_id]["status"] = "CLOSED"
-            boards[board_id]["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self._save_boards(boards)
+            board_data = dict(board_data)
+            board_data["status"] = "CLOSED"
+            board_data["end_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.storage.put("boards", board_id, board_data)
+            self._touch_board(board_id, "header")
             
             return json.dumps({"message": "Board closed successfully"})
         
@@ -204,6 +153,69 @@ class ProjectBoard(ProjectBoardBase):
         except Exception as e:
             raise Exception(f"Error closing board: {str(e)}")
     
+    def _build_task(self, req_data, member_sets):
+        """
+        Validate a task spec and return the new task record.
+        member_sets caches team_id -> set of member ids across a batch.
+        """
+        title = req_data.get("title")
+        description = req_data.get("description")
+        user_id = req_data.get("user_id")
+        board_id = req_data.get("board_id")
+        
+        if not title:
+            raise ValueError("Task title is required")
+        
+        if not description:
+            raise ValueError("Description is required")
+        
+        if not user_id:
+            raise ValueError("User ID is required")
+        
+        if not board_id:
+            raise ValueError("Board ID is required")
+        
+        if not all(isinstance(value, str) for value in (title, description, user_id, board_id)):
+            raise ValueError("Title, description, user_id and board_id must be strings")
+        
+        if len(title) > 64:
+            raise ValueError("Task title cannot exceed 64 characters")
+        
+        if len(description) > 128:
+            raise ValueError("Description cannot exceed 128 characters")
+        
+        # The board's task set is locked until commit, so title checks on
+        # one board never race while other boards proceed in parallel
+        self.storage.lock(("boards", board_id))
+        board_data = self.storage.get("boards", board_id)
+        if board_data is None:
+            raise ValueError(f"Board with ID '{board_id}' does not exist")
+        
+        if board_data["status"] != "OPEN":
+            raise ValueError("Can only add tasks to OPEN boards")
+        
+        if not self.storage.contains("users", user_id):
+            raise ValueError(f"User with ID '{user_id}' does not exist")
+        
+        team_id = board_data["team_id"]
+        if team_id not in member_sets:
+            member_sets[team_id] = set(self.storage.get("team_members", team_id, []))
+        if user_id not in member_sets[team_id]:
+            raise ValueError(f"User '{user_id}' is not a member of the team that owns this board")
+        
+        if self.storage.find("tasks", board_id=board_id, title=title) is not None:
+            raise ValueError(f"Task with title '{title}' already exists in this board")
+        
+        return {
+            "title": title,
+            "description": description,
+            "user_id": user_id,
+            "board_id": board_id,
+            "creation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "OPEN"
+        }
+    
+    @transactional
     def add_task(self, request: str) -> str:
         """
         Add a task to a board
@@ -218,65 +230,12 @@ class ProjectBoard(ProjectBoardBase):
         """
         try:
             req_data = json.loads(request)
-            title = req_data.get("title")
-            description = req_data.get("description")
-            user_id = req_data.get("user_id")
-            board_id = req_data.get("board_id")
-            
-            if not title:
-                raise ValueError("Task title is required")
-            
-            if not description:
-                raise ValueError("Description is required")
-            
-            if not user_id:
-                raise ValueError("User ID is required")
-            
-            if not board_id:
-                raise ValueError("Board ID is required")
-            
-            if len(title) > 64:
-                raise ValueError("Task title cannot exceed 64 characters")
-            
-            if len(description) > 128:
-                raise ValueError("Description cannot exceed 128 characters")
+            task_data = self._build_task(req_data, {})
             
-            boards = self._load_boards()
-            if board_id not in boards:
-                raise ValueError(f"Board with ID '{board_id}' does not exist")
+            task_id = self._generate_task_id()
             
-            if boards[board_id]["status"] != "OPEN":
-                raise ValueError("Can only add tasks to OPEN boards")
-            
-            users = self._load_users()
-            if user_id not in users:
-                raise ValueError(f"User with ID '{user_id}' does not exist")
-            
-            team_id = boards[board_id]["team_id"]
-            team_members = self._load_team_members()
-            if team_id not in team_members or user_id not in team_members[team_id]:
-                raise ValueError(f"User '{user_id}' is not a member of the team that owns this board")
-            
-            tasks = self._load_tasks()
-            
-            for task_id, task_data in tasks.items():
-                if task_data["board_id"] == board_id and task_data["title"] == title:
-                    raise ValueError(f"Task with title '{title}' already exists in this board")
-            
-            task_id = self._generate_task_id(tasks)
-            
-            task_data = {
-                "title": title,
-                "description": description,
-                "user_id": user_id,
-                "board_id": board_id,
-                "creation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "status": "OPEN"
-            }
-            
-            
-            tasks[task_id] = task_data
-            self._save_tasks(tasks)
+            self.storage.put("tasks", task_id, task_data)
+            self._touch_board(task_data["board_id"], "OPEN")
             
             return json.dumps({"id": task_id})
         
@@ -285,6 +244,81 @@ class ProjectBoard(ProjectBoardBase):
         except Exception as e:
             raise Exception(f"Error adding task: {str(e)}")
     
+    @transactional
+    def add_tasks(self, request: str) -> str:
+        """
+        Add many tasks in one call. Every task is validated like add_task,
+        including duplicate titles within the batch; valid tasks are created
+        and stored with a single write, invalid ones are reported.
+        
+        Example request:
+        {
+            "tasks": [
+                {
+                    "title": "Implement login API",
+                    "description": "Create REST API for user authentication",
+                    "user_id": "user_1",
+                    "board_id": "board_1"
+                }
+            ]
+        }
+        
+        Example response (one entry per task, in request order):
+        {
+            "results": [
+                {"id": "task_7"},
+                {"error": "Task with title 'Write tests' already exists in this board"}
+            ]
+        }
+        """
+        try:
+            req_data = json.loads(request)
+            task_specs = req_data.get("tasks")
+            
+            if not isinstance(task_specs, list) or not task_specs:
+                raise ValueError("At least one task is required")
+            
+            # Lock every board of the batch at once, in a fixed order
+            self.storage.lock(*(("boards", spec["board_id"]) for spec in task_specs
+                                if isinstance(spec, dict) and isinstance(spec.get("board_id"), str)))
+            
+            member_sets = {}
+            batch_titles = set()
+            results = []
+            new_tasks = []
+            
+            for task_spec in task_specs:
+                try:
+                    if not isinstance(task_spec, dict):
+                        raise ValueError("Each task must be an object")
+                    task_data = self._build_task(task_spec, member_sets)
+                    
+                    title_key = (task_data["board_id"], task_data["title"])
+                    if title_key in batch_titles:
+                        raise ValueError(f"Task with title '{task_data['title']}' appears more than once in this batch")
+                    batch_titles.add(title_key)
+                    
+                    results.append(None)
+                    new_tasks.append((len(results) - 1, task_data))
+                except Exception as e:
+                    results.append({"error": str(e)})
+            
+            if new_tasks:
+                task_ids = self.storage.next_ids("tasks", len(new_tasks))
+                for task_id, (position, task_data) in zip(task_ids, new_tasks):
+                    self.storage.put("tasks", task_id, task_data)
+                    results[position] = {"id": task_id}
+                for board_id in {task_data["board_id"] for _, task_data in new_tasks}:
+                    self._touch_board(board_id, "OPEN")
+            
+            return json.dumps({"results": results})
+        
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error adding tasks: {str(e)}")
+    
+    @transactional
     def update_task_status(self, request: str):
         """
         Update the status of a task
@@ -311,14 +345,17 @@ class ProjectBoard(ProjectBoardBase):
             if new_status not in valid_statuses:
                 raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
             
-            tasks = self._load_tasks()
+            task_data = self.storage.get("tasks", task_id)
             
-            if task_id not in tasks:
+            if task_data is None:
                 raise ValueError(f"Task with ID '{task_id}' not found")
             
-           
-            tasks[task_id]["status"] = new_status
-            self._save_tasks(tasks)
+            self.storage.lock(("boards", task_data["board_id"]))
+            task_data = self.storage.get("tasks", task_id)
+            
+            self.storage.put("tasks", task_id, dict(task_data, status=new_status))
+            if task_data["status"] != new_status:
+                self._touch_board(task_data["board_id"], task_data["status"], new_status)
             
             return json.dumps({"message": "Task status updated successfully"})
         
@@ -327,50 +364,230 @@ class ProjectBoard(ProjectBoardBase):
         except Exception as e:
             raise Exception(f"Error updating task status: {str(e)}")
     
+    @transactional
+    def update_task_statuses(self, request: str) -> str:
+        """
+        Update the status of many tasks with a single write. Either list the
+        tasks explicitly, or select a board's tasks (optionally only those
+        in a given status) and move them all to one status.
+        
+        Example requests:
+        {
+            "updates": [
+                {"id": "task_1", "status": "COMPLETE"},
+                {"id": "task_2", "status": "IN_PROGRESS"}
+            ]
+        }
+        {
+            "filter": {"board_id": "board_1", "status": "IN_PROGRESS"},
+            "status": "COMPLETE"
+        }
+        
+        Example response (one entry per task):
+        {
+            "results": [
+                {"id": "task_1", "status": "COMPLETE"},
+                {"id": "task_9", "error": "Task with ID 'task_9' not found"}
+            ]
+        }
+        """
+        try:
+            req_data = json.loads(request)
+            updates = req_data.get("updates")
+            task_filter = req_data.get("filter")
+            
+            valid_statuses = ["OPEN", "IN_PROGRESS", "COMPLETE"]
+            
+            if (updates is None) == (task_filter is None):
+                raise ValueError("Provide either 'updates' or 'filter'")
+            
+            if task_filter is not None:
+                new_status = req_data.get("status")
+                board_id = task_filter.get("board_id")
+                current_status = task_filter.get("status")
+                
+                if not board_id:
+                    raise ValueError("Filter must include a board_id")
+                
+                if not self.storage.contains("boards", board_id):
+                    raise ValueError(f"Board with ID '{board_id}' not found")
+                
+                if new_status not in valid_statuses:
+                    raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
+                
+                if current_status is not None and current_status not in valid_statuses:
+                    raise ValueError(f"Filter status must be one of: {', '.join(valid_statuses)}")
+                
+                self.storage.lock(("boards", board_id))
+                filters = {"board_id": board_id}
+                if current_status is not None:
+                    filters["status"] = current_status
+                updates = [{"id": task_id, "status": new_status}
+                           for task_id, _ in self.storage.filter("tasks", **filters)]
+            
+            if not isinstance(updates, list):
+                raise ValueError("Updates must be a list")
+            
+            boards = set()
+            for update in updates:
+                task_id = update.get("id") if isinstance(update, dict) else None
+                task_data = self.storage.get("tasks", task_id) if isinstance(task_id, str) else None
+                if task_data is not None:
+                    boards.add(("boards", task_data["board_id"]))
+            self.storage.lock(*boards)
+            
+            results = []
+            touched = {}
+            for update in updates:
+                task_id = update.get("id") if isinstance(update, dict) else None
+                new_status = update.get("status") if isinstance(update, dict) else None
+                
+                if not task_id:
+                    results.append({"id": task_id, "error": "Task ID is required"})
+                    continue
+                
+                if not isinstance(task_id, str):
+                    results.append({"id": task_id, "error": "Task ID must be a string"})
+                    continue
+                
+                if new_status not in valid_statuses:
+                    results.append({"id": task_id, "error": f"Status must be one of: {', '.join(valid_statuses)}"})
+                    continue
+                
+                task_data = self.storage.get("tasks", task_id)
+                if task_data is None:
+                    results.append({"id": task_id, "error": f"Task with ID '{task_id}' not found"})
+                    continue
+                
+                if task_data["status"] != new_status:
+                    self.storage.put("tasks", task_id, dict(task_data, status=new_status))
+                    touched.setdefault(task_data["board_id"], set()).update((task_data["status"], new_status))
+                results.append({"id": task_id, "status": new_status})
+            
+            for board_id, sections in touched.items():
+                self._touch_board(board_id, *sections)
+            
+            return json.dumps({"results": results})
+        
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error updating task statuses: {str(e)}")
+    
     def list_boards(self, request: str) -> str:
         """
-        List all boards for a team
+        List all boards for a team, optionally only those with a given status
         
         Example request:
         {
-          "id": "team_1"
+          "id": "team_1",
+          "status": "OPEN",
+          "limit": 50,
+          "cursor": "board_120"
         }
+        limit and cursor are optional; with either, the response is a page
+        {"items": [...], "next_cursor": ...}
         """
         try:
             req_data = json.loads(request)
             team_id = req_data.get("id")
+            status = req_data.get("status")
+            limit, cursor = page_request(req_data)
             
             if not team_id:
                 raise ValueError("Team ID is required")
             
+            valid_statuses = ["OPEN", "CLOSED"]
+            if status is not None and status not in valid_statuses:
+                raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
+            
           
-            teams = self._load_teams()
-            if team_id not in teams:
+            if not self.storage.contains("teams", team_id):
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
             
-            boards = self._load_boards()
+            filters = {"team_id": team_id}
+            if status is not None:
+                filters["status"] = status
+            
+            if limit is None:
+                records, next_cursor = self.storage.filter("boards", **filters), None
+            else:
+                records, next_cursor = self.storage.page("boards", limit, cursor, **filters)
+            
             board_list = []
             
-            for board_id, board_data in boards.items():
-                if board_data["team_id"] == team_id:
-                    board_list.append({
-                        "id": board_id,
-                        "name": board_data["name"],
-                        "status": board_data["status"]
-                    })
+            for board_id, board_data in records:
+                board_list.append({
+                    "id": board_id,
+                    "name": board_data["name"],
+                    "status": board_data["status"]
+                })
+            
+            if limit is None:
+                return json.dumps(board_list, indent=2)
+            return json.dumps({"items": board_list, "next_cursor": next_cursor}, indent=2)
+        
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error listing boards: {str(e)}")
+    
+    def iter_boards(self, request: str = None):
+        """
+        Return a generator of boards as dicts, including their team_id,
+        read from the storage a page at a time. The request is checked
+        right away; without one every board of every team is yielded.
+        
+        Example request:
+        {
+          "id": "team_1",
+          "status": "OPEN"
+        }
+        """
+        try:
+            req_data = json.loads(request) if request else {}
+            team_id = req_data.get("id")
+            status = req_data.get("status")
             
-            return json.dumps(board_list, indent=2)
+            valid_statuses = ["OPEN", "CLOSED"]
+            if status is not None and status not in valid_statuses:
+                raise ValueError(f"Status must be one of: {', '.join(valid_statuses)}")
+            
+            if team_id is not None and not self.storage.contains("teams", team_id):
+                raise ValueError(f"Team with ID '{team_id}' not found")
+            
+            filters = {}
+            if team_id is not None:
+                filters["team_id"] = team_id
+            if status is not None:
+                filters["status"] = status
         
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in request")
         except Exception as e:
             raise Exception(f"Error listing boards: {str(e)}")
+        
+        return ({
+            "id": board_id,
+            "team_id": board_data["team_id"],
+            "name": board_data["name"],
+            "status": board_data["status"]
+        } for board_id, board_data in self.storage.stream("boards", **filters))
+    
+    def stream_boards(self, request: str = None):
+        """Like iter_boards, but yields each board as one line of newline-delimited JSON"""
+        return (json.dumps(board) + "\n" for board in self.iter_boards(request))
     
     def export_board(self, request: str) -> str:
         """
         Export a board to a beautiful text file in the out folder
         
+        Each section of the report is cached in the db folder and reused
+        until a change to the board bumps its version: exporting an
+        unchanged board returns the previous file, and after a change only
+        the affected sections are rendered again.
+        
         Example request:
         {
           "id": "board_1"
@@ -383,101 +600,298 @@ class ProjectBoard(ProjectBoardBase):
             if not board_id:
                 raise ValueError("Board ID is required")
             
-            boards = self._load_boards()
-            
-            if board_id not in boards:
-                raise ValueError(f"Board with ID '{board_id}' not found")
-            
-            board_data = boards[board_id]
-            
-          
-            teams = self._load_teams()
-            team_data = teams.get(board_data["team_id"], {})
-            
-            
-            tasks = self._load_tasks()
-            board_tasks = []
-            for task_id, task_data in tasks.items():
-                if task_data["board_id"] == board_id:
-                    board_tasks.append((task_id, task_data))
-            
-            
-            users = self._load_users()
-            
-            
-            output = []
-            output.append("=" * 80)
-            output.append(f"PROJECT BOARD: {board_data['name']}")
-            output.append("=" * 80)
-            output.append(f"Team: {team_data.get('name', 'Unknown')}")
-            output.append(f"Description: {board_data['description']}")
-            output.append(f"Status: {board_data['status']}")
-            output.append(f"Created: {board_data['creation_time']}")
-            if board_data['end_time']:
-                output.append(f"Closed: {board_data['end_time']}")
-            output.append("=" * 80)
-            output.append("")
-            
-            # Group tasks 
-            status_groups = {
-                "OPEN": [],
-                "IN_PROGRESS": [],
-                "COMPLETE": []
-            }
-            
-            for task_id, task_data in board_tasks:
-                status_groups[task_data["status"]].append((task_id, task_data))
+            try:
+                filename = self._export_cached(board_id)
+            except FileNotFoundError:
+                # A concurrent export pruned a fragment this one meant to reuse
+                filename = self._export_cached(board_id)
             
-            # Display tasks
-            for status in ["OPEN", "IN_PROGRESS", "COMPLETE"]:
-                tasks_in_status = status_groups[status]
-                
-                output.append("")
-                output.append(f"{'▓' * 80}")
-                output.append(f"  {status} ({len(tasks_in_status)} tasks)")
-                output.append(f"{'▓' * 80}")
-                output.append("")
-                
-                if not tasks_in_status:
-                    output.append("  No tasks in this status")
-                    output.append("")
+            return json.dumps({"out_file": filename})
+        
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error exporting board: {str(e)}")
+    
+    def _export_cached(self, board_id):
+        """Bring the cached sections of a board up to date and return its report file"""
+        # Versions are read before the data, so a change made while a section
+        # renders leaves that section outdated, and never passes stale data
+        # off as current
+        versions = {section: self.storage.get("sequences", f"{board_id}:{section}", 0)
+                    for section in REPORT_SECTIONS}
+        
+        board_data = self.storage.get("boards", board_id)
+        if board_data is None:
+            raise ValueError(f"Board with ID '{board_id}' not found")
+        
+        team_data = self.storage.get("teams", board_data["team_id"], {})
+        team_name = team_data.get("name", "Unknown")
+        
+        user_names = {}
+        def assignee(user_id):
+            if user_id not in user_names:
+                user_data = self.storage.get("users", user_id, {})
+                user_names[user_id] = user_data.get("display_name", "Unknown User")
+            return user_names[user_id]
+        
+        # The cache lives with the data it was rendered from, since several
+        # db folders may export into the same out folder
+        cache_dir = os.path.join(self.db_folder, "exports", board_id)
+        meta_path = os.path.join(cache_dir, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            meta = {"sections": {}}
+        sections = meta["sections"]
+        
+        # Team and user renames don't bump versions, so names are checked too
+        def is_fresh(section):
+            entry = sections.get(section)
+            if entry is None or entry["version"] != versions[section]:
+                return False
+            if section == "header":
+                return entry["team_name"] == team_name
+            return all(assignee(user_id) == name for user_id, name in entry["names"].items())
+        
+        stale = [section for section in REPORT_SECTIONS if not is_fresh(section)]
+        out_file = meta.get("out_file")
+        if not stale and out_file and os.path.exists(os.path.join(self.out_folder, out_file)):
+            return out_file
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        counts = self.storage.tally("tasks", "status", board_id=board_id)
+        for section in stale:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with open(fd, 'w', encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+                if section == "header":
+                    _write_header(f, board_data, team_name)
+                    entry = {"team_name": team_name}
                 else:
-                    for task_id, task_data in tasks_in_status:
-                        user_data = users.get(task_data["user_id"], {})
-                        user_name = user_data.get("display_name", "Unknown User")
-                        
-                        output.append(f"  [{task_id}] {task_data['title']}")
-                        output.append(f"  {'─' * 76}")
-                        output.append(f"  Description: {task_data['description']}")
-                        output.append(f"  Assigned to: {user_name} ({task_data['user_id']})")
-                        output.append(f"  Created: {task_data['creation_time']}")
-                        output.append("")
-            
-            output.append("=" * 80)
-            output.append(f"SUMMARY")
-            output.append("=" * 80)
-            output.append(f"Total Tasks: {len(board_tasks)}")
-            output.append(f"  • Open: {len(status_groups['OPEN'])}")
-            output.append(f"  • In Progress: {len(status_groups['IN_PROGRESS'])}")
-            output.append(f"  • Complete: {len(status_groups['COMPLETE'])}")
-            
-            completion_rate = 0
-            if board_tasks:
-                completion_rate = (len(status_groups['COMPLETE']) / len(board_tasks)) * 100
-            output.append(f"  • Completion Rate: {completion_rate:.1f}%")
-            output.append("=" * 80)
-            
-            safe_name = board_data['name'].replace(' ', '_').replace('/', '_')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{safe_name}_{board_id}_{timestamp}.txt"
-            filepath = os.path.join(self.out_folder, filename)
-            
-            with open(filepath, 'w', encoding="utf-8") as f:
-                f.write('\n'.join(output))
+                    names = {}
+                    def record(user_id):
+                        names[user_id] = assignee(user_id)
+                        return names[user_id]
+                    
+                    count = counts.get(section, 0)
+                    tasks = self.storage.stream("tasks", board_id=board_id, status=section) if count else ()
+                    _write_section(f, section, count, tasks, record)
+                    entry = {"count": count, "names": names}
+            # Fragments are named by version and never rewritten in place
+            os.replace(tmp_path, _fragment_path(cache_dir, section, versions[section]))
+            sections[section] = dict(entry, version=versions[section])
+        
+        filename = _report_filename(board_id, board_data, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        filepath = os.path.join(self.out_folder, filename)
+        with open(filepath + ".tmp", 'w', encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+            for section in REPORT_SECTIONS:
+                with open(_fragment_path(cache_dir, section, sections[section]["version"]), encoding="utf-8") as fragment:
+                    shutil.copyfileobj(fragment, f, EXPORT_BUFFER_SIZE)
+            _write_summary(f, {section: sections[section]["count"] for section in REPORT_SECTIONS[1:]})
+        os.replace(filepath + ".tmp", filepath)
+        
+        meta["out_file"] = filename
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with open(fd, 'w', encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        
+        # Drop fragments that newer versions have replaced
+        for name in os.listdir(cache_dir):
+            section, _, version = name[:-len(".txt")].rpartition(".")
+            if name.endswith(".txt") and section in sections and version.isdigit() \
+                    and int(version) < sections[section]["version"]:
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except FileNotFoundError:
+                    pass
+        
+        return filename
+    
+    def export_boards(self, request: str = None) -> str:
+        """
+        Export many boards at once, rendering the reports on a pool of
+        worker processes
+        
+        Example request (all fields optional; without ids or team_id every
+        board of every team is exported, workers defaults to the core count):
+        {
+          "ids": ["board_1", "board_2"],
+          "team_id": "team_1",
+          "workers": 4
+        }
+        Returns {"out_files": [...]} in board order
+        """
+        try:
+            req_data = json.loads(request) if request else {}
+            board_ids = req_data.get("ids")
+            team_id = req_data.get("team_id")
+            workers = req_data.get("workers", os.cpu_count() or 1)
+            
+            if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+                raise ValueError("Workers must be a positive integer")
+            
+            if board_ids is not None:
+                if not isinstance(board_ids, list):
+                    raise ValueError("Board IDs must be a list")
+                boards = {}
+                for board_id in board_ids:
+                    board_data = self.storage.get("boards", board_id)
+                    if board_data is None:
+                        raise ValueError(f"Board with ID '{board_id}' not found")
+                    boards[board_id] = board_data
+            elif team_id is not None:
+                if not self.storage.contains("teams", team_id):
+                    raise ValueError(f"Team with ID '{team_id}' not found")
+                boards = dict(self.storage.stream("boards", team_id=team_id))
+            else:
+                boards = dict(self.storage.stream("boards"))
+            
+            # Split the tasks by board in one pass: over all tasks when every
+            # board is exported, otherwise over each board's task index
+            partitions = {board_id: [] for board_id in boards}
+            if board_ids is None and team_id is None:
+                for task_id, task_data in self.storage.stream("tasks"):
+                    # Skip orphan tasks and tasks of boards created after the
+                    # boards were read
+                    partition = partitions.get(task_data["board_id"])
+                    if partition is not None:
+                        partition.append((task_id, task_data))
+            else:
+                for board_id in boards:
+                    partitions[board_id] = list(self.storage.stream("tasks", board_id=board_id))
+            
+            # Names are looked up once however many boards share them
+            team_names, user_names = {}, {}
+            for board_data in boards.values():
+                if board_data["team_id"] not in team_names:
+                    team_data = self.storage.get("teams", board_data["team_id"], {})
+                    team_names[board_data["team_id"]] = team_data.get("name", "Unknown")
+            for tasks in partitions.values():
+                for _, task_data in tasks:
+                    if task_data["user_id"] not in user_names:
+                        user_data = self.storage.get("users", task_data["user_id"], {})
+                        user_names[task_data["user_id"]] = user_data.get("display_name", "Unknown User")
             
-            return json.dumps({"out_file": filename})
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            jobs = []
+            for board_id, board_data in boards.items():
+                tasks = partitions[board_id]
+                jobs.append((
+                    os.path.join(self.out_folder, _report_filename(board_id, board_data, timestamp)),
+                    board_data,
+                    team_names[board_data["team_id"]],
+                    tasks,
+                    {task_data["user_id"]: user_names[task_data["user_id"]] for _, task_data in tasks}
+                ))
+            
+            if workers == 1 or len(jobs) <= 1:
+                out_files = [_export_partition(job) for job in jobs]
+            else:
+                workers = min(workers, len(jobs))
+                with ProcessPoolExecutor(workers) as pool:
+                    out_files = list(pool.map(_export_partition, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+            
+            return json.dumps({"out_files": out_files})
         
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in request")
         except Exception as e:
-            raise Exception(f"Error exporting board: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error exporting boards: {str(e)}")
+
+
+def _report_filename(board_id, board_data, timestamp):
+    """Return the out folder file name of a board report"""
+    safe_name = board_data['name'].replace(' ', '_').replace('/', '_')
+    return f"{safe_name}_{board_id}_{timestamp}.txt"
+
+
+def _fragment_path(cache_dir, section, version):
+    """Return the cache file of one version of a report section"""
+    return os.path.join(cache_dir, f"{section}.{version}.txt")
+
+
+def _write_header(f, board_data, team_name):
+    """Write the board details that open a report"""
+    f.write("=" * 80 + "\n")
+    f.write(f"PROJECT BOARD: {board_data['name']}\n")
+    f.write("=" * 80 + "\n")
+    f.write(f"Team: {team_name}\n")
+    f.write(f"Description: {board_data['description']}\n")
+    f.write(f"Status: {board_data['status']}\n")
+    f.write(f"Created: {board_data['creation_time']}\n")
+    if board_data['end_time']:
+        f.write(f"Closed: {board_data['end_time']}\n")
+    f.write("=" * 80 + "\n")
+    f.write("\n")
+
+
+def _write_section(f, status, count, tasks, assignee):
+    """Write the tasks of one status; assignee(user_id) returns a display name"""
+    f.write("\n")
+    f.write(f"{'▓' * 80}\n")
+    f.write(f"  {status} ({count} tasks)\n")
+    f.write(f"{'▓' * 80}\n")
+    f.write("\n")
+    
+    if not count:
+        f.write("  No tasks in this status\n")
+        f.write("\n")
+        return
+    
+    for task_id, task_data in tasks:
+        f.write(f"  [{task_id}] {task_data['title']}\n")
+        f.write(f"  {'─' * 76}\n")
+        f.write(f"  Description: {task_data['description']}\n")
+        f.write(f"  Assigned to: {assignee(task_data['user_id'])} ({task_data['user_id']})\n")
+        f.write(f"  Created: {task_data['creation_time']}\n")
+        f.write("\n")
+
+
+def _write_summary(f, counts):
+    """Write the closing task counts of a report"""
+    total = sum(counts.values())
+    f.write("=" * 80 + "\n")
+    f.write(f"SUMMARY\n")
+    f.write("=" * 80 + "\n")
+    f.write(f"Total Tasks: {total}\n")
+    f.write(f"  • Open: {counts.get('OPEN', 0)}\n")
+    f.write(f"  • In Progress: {counts.get('IN_PROGRESS', 0)}\n")
+    f.write(f"  • Complete: {counts.get('COMPLETE', 0)}\n")
+    
+    completion_rate = 0
+    if total:
+        completion_rate = (counts.get('COMPLETE', 0) / total) * 100
+    f.write(f"  • Completion Rate: {completion_rate:.1f}%\n")
+    f.write("=" * 80)
+
+
+def _write_report(filepath, board_data, team_name, counts, tasks_of, assignee):
+    """
+    Write a whole board report through a buffered temp file renamed into
+    place. counts maps each status to its number of tasks and
+    tasks_of(status) iterates over that status's (id, task) pairs.
+    """
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, 'w', encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+        _write_header(f, board_data, team_name)
+        for status in REPORT_SECTIONS[1:]:
+            _write_section(f, status, counts.get(status, 0), tasks_of(status), assignee)
+        _write_summary(f, counts)
+    
+    # A half-written report never shows up under the final name
+    os.replace(tmp_path, filepath)
+
+
+def _export_partition(job):
+    """Write the report of one board of export_boards; runs in a worker process"""
+    filepath, board_data, team_name, tasks, user_names = job
+    sections = {}
+    for task_id, task_data in tasks:
+        sections.setdefault(task_data["status"], []).append((task_id, task_data))
+    counts = {status: len(section) for status, section in sections.items()}
+    _write_report(filepath, board_data, team_name, counts,
+                  lambda status: sections.get(status, ()),
+                  lambda user_id: user_names.get(user_id, "Unknown User"))
+    return os.path.basename(filepath)
@@ -0,0 +1,226 @@
+"""
+Compact binary snapshot format for the collections of a db folder.
+
+A snapshot file holds one collection. Every distinct string of the
+collection (ids, names, statuses, ...) is stored once in a string table,
+and everything else refers to strings by their index, so repeated values
+such as statuses, team ids and assignees cost four bytes each and load as
+one shared object. Layout, little-endian:
+
+    b"PLNB", version (u8), layout (u8)
+    string table: kind (u8), then the count of strings (u32) and the UTF-8
+                  of all strings separated by NUL, or when a string
+                  contains NUL, the character length of every string (u32
+                  array) followed by their UTF-8
+    keys: string indices (u32 array)
+    RECORDS: field names (u32 array), then one column per field: a kind
+             byte followed by string indices (u32 array, with markers for
+             None and absent fields in nullable columns), or a JSON array
+             for fields that hold something other than strings
+    LISTS:   list lengths (u32 array), concatenated string indices
+    JSON:    the whole collection as a JSON object
+
+Arrays are written as a u32 item count followed by the items.
+"""
+
+import array
+import itertools
+import json
+import struct
+import sys
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b"PLNB"
+VERSION = 1
+
+# How the values of a collection are laid out
+RECORDS, LISTS, JSON = 0, 1, 2
+
+# Encodings of the string table
+SEPARATED_TABLE, LENGTH_PREFIXED_TABLE = 0, 1
+
+# Column kinds of the RECORDS layout
+STRING_COLUMN, JSON_COLUMN, NULLABLE_COLUMN = 0, 1, 2
+
+# Column entries that are not string table indices
+NONE = 0xFFFFFFFF
+ABSENT = 0xFFFFFFFE
+
+_missing = object()
+
+
+def _layout(data: Dict[str, Any]) -> int:
+    """Pick the most compact layout the values of a collection fit"""
+    values = data.values()
+    if all(isinstance(value, dict) for value in values):
+        return RECORDS
+    if all(isinstance(value, list) and all(isinstance(item, str) for item in value) for value in values):
+        return LISTS
+    return JSON
+
+
+def _pack_array(values) -> bytes:
+    """Encode a sequence of u32 as a count followed by the items"""
+    items = array.array('I', values)
+    if sys.byteorder == "big":
+        items.byteswap()
+    return struct.pack("<I", len(items)) + items.tobytes()
+
+
+def _pack_bytes(blob: bytes) -> bytes:
+    """Encode a byte string as its length followed by the bytes"""
+    return struct.pack("<I", len(blob)) + blob
+
+
+def dumps(data: Dict[str, Any]) -> bytes:
+    """Encode a collection (id -> record, list or value) as a binary snapshot"""
+    table: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+    layout = _layout(data)
+    parts = [_pack_array([intern(key) for key in data])]
+
+    if layout == RECORDS:
+        fields = list(dict.fromkeys(field for record in data.values() for field in record))
+        parts.append(_pack_array([intern(field) for field in fields]))
+        for field in fields:
+            column = [record.get(field, _missing) for record in data.values()]
+            if all(isinstance(value, str) for value in column):
+                parts.append(bytes([STRING_COLUMN]))
+                parts.append(_pack_array([intern(value) for value in column]))
+            elif all(value is None or value is _missing or isinstance(value, str) for value in column):
+                parts.append(bytes([NULLABLE_COLUMN]))
+                parts.append(_pack_array([
+                    NONE if value is None else ABSENT if value is _missing else intern(value)
+                    for value in column]))
+            else:
+                # Absent entries turn into null, plus a list of where they were
+                parts.append(bytes([JSON_COLUMN]))
+                parts.append(_pack_bytes(json.dumps(
+                    [None if value is _missing else value for value in column], separators=(",", ":")).encode()))
+                parts.append(_pack_array([i for i, value in enumerate(column) if value is _missing]))
+    elif layout == LISTS:
+        parts.append(_pack_array([len(value) for value in data.values()]))
+        parts.append(_pack_array([intern(item) for value in data.values() for item in value]))
+    else:
+        parts.append(_pack_bytes(json.dumps(data, separators=(",", ":")).encode()))
+
+    strings = list(table)
+    header = MAGIC + bytes([VERSION, layout])
+    if any("\0" in s for s in strings):
+        string_table = bytes([LENGTH_PREFIXED_TABLE]) + _pack_array([len(s) for s in strings]) \
+            + _pack_bytes("".join(strings).encode())
+    else:
+        # Splitting on a separator is much faster to load than slicing
+        string_table = bytes([SEPARATED_TABLE]) + struct.pack("<I", len(strings)) \
+            + _pack_bytes("\0".join(strings).encode())
+    return b"".join([header, string_table] + parts)
+
+
+class _Reader:
+    """Cursor over the bytes of a snapshot"""
+
+    def __init__(self, blob: bytes):
+        self.blob = memoryview(blob)
+        self.pos = 0
+
+    def byte(self) -> int:
+        value = self.blob[self.pos]
+        self.pos += 1
+        return value
+
+    def u32(self) -> int:
+        (value,) = struct.unpack_from("<I", self.blob, self.pos)
+        self.pos += 4
+        return value
+
+    def bytes(self) -> bytes:
+        length = self.u32()
+        start = self.pos
+        self.pos = start + length
+        return self.blob[start:self.pos].tobytes()
+
+    def array(self) -> array.array:
+        count = self.u32()
+        start = self.pos
+        self.pos = start + 4 * count
+        items = array.array('I')
+        items.frombytes(self.blob[start:self.pos])
+        if sys.byteorder == "big":
+            items.byteswap()
+        return items
+
+
+def _record_builder(fields: List[str]):
+    """Return a function building a record dict from one value per field"""
+    # A dict display with constant keys builds records far faster than
+    # dict(zip(fields, values)); field names only ever appear as literals
+    params = ", ".join(f"v{i}" for i in range(len(fields)))
+    items = ", ".join(f"{field!r}: v{i}" for i, field in enumerate(fields))
+    return eval(f"lambda {params}: {{{items}}}", {})
+
+
+def loads(blob: bytes) -> Dict[str, Any]:
+    """Decode a binary snapshot written by dumps()"""
+    if blob[:4] != MAGIC:
+        raise ValueError("Not a binary snapshot")
+    reader = _Reader(blob)
+    reader.pos = 4
+    version, layout = reader.byte(), reader.byte()
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    if reader.byte() == SEPARATED_TABLE:
+        count = reader.u32()
+        text = reader.bytes().decode("utf-8")
+        strings = text.split("\0") if count else []
+    else:
+        lengths = reader.array()
+        text = reader.bytes().decode("utf-8")
+        ends = itertools.accumulate(lengths)
+        strings = [text[end - length:end] for length, end in zip(lengths, ends)]
+    keys = list(map(strings.__getitem__, reader.array()))
+
+    if layout == RECORDS:
+        fields = list(map(strings.__getitem__, reader.array()))
+        columns: List[list] = []
+        absent: List[Tuple[int, set]] = []
+        for position in range(len(fields)):
+            kind = reader.byte()
+            if kind == STRING_COLUMN:
+                column = list(map(strings.__getitem__, reader.array()))
+                gaps = set()
+            elif kind == NULLABLE_COLUMN:
+                indices = reader.array()
+                column = [None if i >= ABSENT else strings[i] for i in indices]
+                gaps = {row for row, i in enumerate(indices) if i == ABSENT}
+            else:
+                column = json.loads(reader.bytes())
+                gaps = set(reader.array())
+            columns.append(column)
+            if gaps:
+                absent.append((position, gaps))
+
+        if not fields:
+            return {key: {} for key in keys}
+        records = map(_record_builder(fields), *columns)
+        if not absent:
+            return dict(zip(keys, records))
+        records = list(records)
+        for position, gaps in absent:
+            for row in gaps:
+                del records[row][fields[position]]
+        return dict(zip(keys, records))
+
+    if layout == LISTS:
+        sizes = reader.array()
+        items = list(map(strings.__getitem__, reader.array()))
+        ends = itertools.accumulate(sizes)
+        return {key: items[end - size:end] for key, size, end in zip(keys, sizes, ends)}
+
+    return json.loads(reader.bytes())
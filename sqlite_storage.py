@@ -0,0 +1,330 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .storage_base import StorageBase
+
+
+# Column layout of the record collections, id is always the primary key
+RECORD_COLUMNS = {
+    "users": ("name", "display_name", "creation_time"),
+    "teams": ("name", "description", "creation_time", "admin"),
+    "boards": ("name", "description", "team_id", "creation_time", "status", "end_time"),
+    "tasks": ("title", "description", "user_id", "board_id", "creation_time", "status"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    creation_time TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_name ON users (name);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    creation_time TEXT,
+    admin TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_teams_name ON teams (name);
+
+CREATE TABLE IF NOT EXISTS boards (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    team_id TEXT NOT NULL,
+    creation_time TEXT,
+    status TEXT,
+    end_time TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_boards_team_name ON boards (team_id, name);
+CREATE INDEX IF NOT EXISTS idx_boards_team ON boards (team_id);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    user_id TEXT NOT NULL,
+    board_id TEXT NOT NULL,
+    creation_time TEXT,
+    status TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_board_title ON tasks (board_id, title);
+CREATE INDEX IF NOT EXISTS idx_tasks_user ON tasks (user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_board_status ON tasks (board_id, status);
+
+CREATE TABLE IF NOT EXISTS team_members (
+    team_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (team_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_team_members_user ON team_members (user_id);
+CREATE INDEX IF NOT EXISTS idx_team_members_position ON team_members (team_id, position);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    id TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_teams (
+    user_id TEXT NOT NULL,
+    team_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, team_id)
+);
+"""
+
+
+class SqliteStorage(StorageBase):
+    """
+    Storage engine backed by a SQLite database (db/planner.db).
+
+    Every collection is a table with indexes on the unique keys, so the
+    uniqueness checks and the board/team filters of the managers become
+    indexed lookups instead of scans over every record.
+
+    Each thread gets its own connection, so its transaction stays separate
+    from the other threads'; SQLite serializes the writers.
+    """
+
+    def __init__(self, db_folder: str = "db", filename: str = "planner.db"):
+        """Open (and create if needed) the SQLite database in the db folder"""
+        super().__init__()
+        self.db_folder = db_folder
+
+        if not os.path.exists(self.db_folder):
+            os.makedirs(self.db_folder)
+
+        self.path = os.path.join(self.db_folder, filename)
+        self._connections = []
+        self._connections_guard = threading.Lock()
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Writers from other threads and processes wait on each other
+            # instead of failing
+            conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            # In WAL mode a commit doesn't block readers, who keep reading
+            # the last committed state
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._connections_guard:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Commit pending changes and close the database"""
+        with self._connections_guard:
+            for conn in self._connections:
+                conn.commit()
+                conn.close()
+            self._connections = []
+
+    def _check(self, collection: str) -> None:
+        """Reject unknown collection names before they reach any SQL"""
+        if collection not in self.COLLECTIONS:
+            raise KeyError(f"Unknown collection '{collection}'")
+
+    def _owner_column(self, collection: str) -> str:
+        """Return the key column of a collection"""
+        if collection == "team_members":
+            return "team_id"
+        if collection == "user_teams":
+            return "user_id"
+        return "id"
+
+    def _fetch_list(self, collection: str, key: str) -> Optional[list]:
+        """Return the list stored under key in team_members or user_teams"""
+        if collection == "team_members":
+            rows = self._conn.execute(
+                "SELECT user_id FROM team_members WHERE team_id = ? ORDER BY position", (key,))
+        else:
+            rows = self._conn.execute(
+                "SELECT team_id FROM user_teams WHERE user_id = ? ORDER BY position", (key,))
+        values = [row[0] for row in rows]
+        return values or None
+
+    def get(self, collection: str, key: str, default: Any = None) -> Any:
+        """Return a single record, or default if it doesn't exist"""
+        self._check(collection)
+        if collection == "sequences":
+            row = self._conn.execute("SELECT value FROM sequences WHERE id = ?", (key,)).fetchone()
+            return default if row is None else row[0]
+        if collection not in RECORD_COLUMNS:
+            value = self._fetch_list(collection, key)
+            return default if value is None else value
+
+        columns = RECORD_COLUMNS[collection]
+        row = self._conn.execute(
+            f"SELECT {', '.join(columns)} FROM {collection} WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return dict(zip(columns, row))
+
+    def contains(self, collection: str, key: str) -> bool:
+        """Check whether a record exists"""
+        self._check(collection)
+        row = self._conn.execute(
+            f"SELECT 1 FROM {collection} WHERE {self._owner_column(collection)} = ? LIMIT 1", (key,)).fetchone()
+        return row is not None
+
+    def put(self, collection: str, key: str, value: Any) -> None:
+        """Insert or replace a record; committed on the next flush"""
+        self._check(collection)
+        if collection == "sequences":
+            self._conn.execute(
+                "INSERT INTO sequences (id, value) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET value = excluded.value", (key, value))
+            return
+        if collection == "team_members":
+            self._conn.execute("DELETE FROM team_members WHERE team_id = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO team_members (team_id, user_id, position) VALUES (?, ?, ?)",
+                [(key, user_id, position) for position, user_id in enumerate(value)])
+            return
+        if collection == "user_teams":
+            self._conn.execute("DELETE FROM user_teams WHERE user_id = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO user_teams (user_id, team_id, position) VALUES (?, ?, ?)",
+                [(key, team_id, position) for position, team_id in enumerate(value)])
+            return
+
+        columns = RECORD_COLUMNS[collection]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+        # Upsert keeps the rowid, so scan order stays the insertion order
+        self._conn.execute(
+            f"INSERT INTO {collection} (id, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 1))}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            (key,) + tuple(value.get(c) for c in columns))
+
+    def delete(self, collection: str, key: str) -> None:
+        """Remove a record if it exists; committed on the next flush"""
+        self._check(collection)
+        self._conn.execute(f"DELETE FROM {collection} WHERE {self._owner_column(collection)} = ?", (key,))
+
+    def keys(self, collection: str) -> Iterable[str]:
+        """Return the ids of all records in a collection"""
+        self._check(collection)
+        column = self._owner_column(collection)
+        return [row[0] for row in self._conn.execute(
+            f"SELECT {column} FROM {collection} GROUP BY {column} ORDER BY MIN(rowid)")]
+
+    def scan(self, collection: str) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (id, record) pairs of a collection"""
+        self._check(collection)
+        if collection == "sequences":
+            yield from self._conn.execute("SELECT id, value FROM sequences ORDER BY rowid").fetchall()
+            return
+        if collection not in RECORD_COLUMNS:
+            for key in self.keys(collection):
+                yield key, self._fetch_list(collection, key)
+            return
+
+        columns = RECORD_COLUMNS[collection]
+        rows = self._conn.execute(f"SELECT id, {', '.join(columns)} FROM {collection} ORDER BY rowid")
+        for row in rows.fetchall():
+            yield row[0], dict(zip(columns, row[1:]))
+
+    def count(self, collection: str) -> int:
+        """Return the number of records in a collection"""
+        self._check(collection)
+        column = self._owner_column(collection)
+        return self._conn.execute(f"SELECT COUNT(DISTINCT {column}) FROM {collection}").fetchone()[0]
+
+    def _where(self, collection: str, fields: Dict[str, Any]) -> Tuple[str, tuple]:
+        """Build a WHERE clause over known columns of a record collection"""
+        if collection not in RECORD_COLUMNS:
+            raise KeyError(f"Collection '{collection}' cannot be filtered by field")
+        for field in fields:
+            if field not in RECORD_COLUMNS[collection]:
+                raise KeyError(f"Unknown field '{field}' for collection '{collection}'")
+        clause = " AND ".join(f"{field} = ?" for field in fields) or "1"
+        return clause, tuple(fields.values())
+
+    def find(self, collection: str, **fields) -> Optional[str]:
+        """Return the id of the first record matching all fields"""
+        self._check(collection)
+        clause, params = self._where(collection, fields)
+        row = self._conn.execute(
+            f"SELECT id FROM {collection} WHERE {clause} ORDER BY rowid LIMIT 1", params).fetchone()
+        return None if row is None else row[0]
+
+    def filter(self, collection: str, **fields) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (id, record) pairs matching all fields"""
+        self._check(collection)
+        clause, params = self._where(collection, fields)
+        columns = RECORD_COLUMNS[collection]
+        rows = self._conn.execute(
+            f"SELECT id, {', '.join(columns)} FROM {collection} WHERE {clause} ORDER BY rowid", params)
+        for row in rows.fetchall():
+            yield row[0], dict(zip(columns, row[1:]))
+
+    def page(self, collection: str, limit: int, after: Optional[str] = None,
+             **fields) -> Tuple[List[Tuple[str, Any]], Optional[str]]:
+        """Return up to limit matching records after the cursor, and the next cursor"""
+        self._check(collection)
+        clause, params = self._where(collection, fields)
+        if after is not None:
+            row = self._conn.execute(f"SELECT rowid FROM {collection} WHERE id = ?", (after,)).fetchone()
+            if row is None:
+                raise ValueError(f"Invalid cursor '{after}'")
+            clause, params = f"{clause} AND rowid > ?", params + (row[0],)
+        columns = RECORD_COLUMNS[collection]
+        # One row past the page tells whether there is a next one
+        rows = self._conn.execute(
+            f"SELECT id, {', '.join(columns)} FROM {collection} WHERE {clause} ORDER BY rowid LIMIT ?",
+            params + (limit + 1,)).fetchall()
+        items = [(row[0], dict(zip(columns, row[1:]))) for row in rows[:limit]]
+        return items, items[-1][0] if len(rows) > limit else None
+
+    def page_list(self, collection: str, key: str, limit: int,
+                  start: int = 0) -> Tuple[List[str], Optional[int]]:
+        """Return up to limit ids of a list from position start on, and the next start"""
+        self._check(collection)
+        if collection == "team_members":
+            value_column = "user_id"
+        elif collection == "user_teams":
+            value_column = "team_id"
+        else:
+            raise KeyError(f"Collection '{collection}' holds no lists")
+        # put() numbers a list's rows 0, 1, 2... so a position is an index
+        rows = self._conn.execute(
+            f"SELECT {value_column} FROM {collection} WHERE {self._owner_column(collection)} = ? "
+            f"AND position >= ? ORDER BY position LIMIT ?", (key, start, limit + 1)).fetchall()
+        values = [row[0] for row in rows[:limit]]
+        return values, start + limit if len(rows) > limit else None
+
+    def tally(self, collection: str, by: str, **fields) -> Dict[Any, int]:
+        """Count the records matching all fields, grouped by the value of by"""
+        self._check(collection)
+        clause, params = self._where(collection, fields)
+        if by not in RECORD_COLUMNS[collection]:
+            raise KeyError(f"Unknown field '{by}' for collection '{collection}'")
+        rows = self._conn.execute(
+            f"SELECT {by}, COUNT(*) FROM {collection} WHERE {clause} GROUP BY {by}", params)
+        return dict(rows.fetchall())
+
+    def flush(self) -> None:
+        """Commit the current transaction"""
+        if self._transaction_depth:
+            return
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        """Discard everything written since the last commit"""
+        self._conn.rollback()
+
+    def _acquire(self) -> None:
+        """Start a write transaction so reads inside it see committed data"""
+        self._conn.commit()
+        self._conn.execute("BEGIN IMMEDIATE")
@@ -0,0 +1,855 @@
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import compact_store, snapshot
+from .journal import Journal
+from .mapped_store import MappedStore
+from .sqlite_storage import SqliteStorage
+from .storage_base import StorageBase, SurrogateKeys
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+
+def _read_snapshot(path: str, snapshot_format: str) -> Dict[str, Any]:
+    """Load a collection from a snapshot file"""
+    if snapshot_format == "binary":
+        with open(path, 'rb') as f:
+            return snapshot.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_snapshot_file(path: str, data: Dict[str, Any], snapshot_format: str) -> None:
+    """Write a collection to a snapshot file and fsync it"""
+    if not isinstance(data, dict):
+        # Compact tables build their records on demand; build them once
+        data = dict(data)
+    with open(path, 'wb' if snapshot_format == "binary" else 'w') as f:
+        if snapshot_format == "binary":
+            f.write(snapshot.dumps(data))
+        else:
+            json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _insert_ordered(entries: array, number: int) -> None:
+    """Add an id's surrogate number to an array kept sorted"""
+    # New ids are the highest so far, so this is nearly always an append
+    if not entries or entries[-1] < number:
+        entries.append(number)
+    else:
+        index = bisect_left(entries, number)
+        if index == len(entries) or entries[index] != number:
+            entries.insert(index, number)
+
+
+def _discard_ordered(entries: array, number: int) -> None:
+    """Remove an id's surrogate number from an array kept sorted"""
+    index = bisect_left(entries, number)
+    if index < len(entries) and entries[index] == number:
+        del entries[index]
+
+
+class JsonStorage(StorageBase):
+    """
+    Shared in-process storage engine over the JSON files of the db folder.
+
+    Every collection (users, teams, boards, ...) is kept in memory as a dict
+    keyed by id. A collection is parsed from disk on first access and only
+    parsed again when its file's mtime or size changed, so API calls no longer
+    pay a full json.load each time.
+
+    With snapshot_format="binary" the collections are kept in the compact
+    format of snapshot.py (db/<collection>.bin) instead of JSON files; it is
+    about half the size and faster to load. convert_snapshots() turns one
+    form into the other.
+
+    With mapped_tasks=True (journaled mode only) tasks live in a memory-mapped
+    record file (db/tasks.dat, see mapped_store.py) instead: only an offset
+    index is loaded and a task is decoded when it is read, so reading or
+    updating one task doesn't depend on how many there are. The tasks
+    snapshot is removed once imported, so tasks.dat holds the only copy,
+    and a storage opened without mapped_tasks refuses such a folder.
+    convert_snapshots() turns it back into a plain one.
+
+    With compact_records=True tasks, boards, teams and the membership lists
+    are held in the columnar tables of compact_store.py instead of a dict
+    per record, which takes a fraction of the memory once a db folder
+    holds millions of tasks. Reads then build each record on demand.
+
+    In journaled mode a flush appends one record to db/journal.log instead of
+    rewriting the JSON files. The journal is replayed on startup and folded
+    back into the snapshot files by a background compactor once it passes
+    its size or record threshold. Without the journal, a flush that touches
+    several files is made atomic with a commit manifest: every file is
+    written to a temp file first, then the manifest is written, then the
+    temp files are renamed into place. A manifest left behind by a crash is
+    rolled forward on startup.
+
+    The unique keys (user name, team name, board name per team, task title
+    per board) are served from hash indexes that are built on first use and
+    kept up to date by put/delete, so find() on them is O(1). Likewise tasks
+    are indexed by board with per-board status tallies, so filtering or
+    counting one board's tasks never touches the others, and boards are
+    indexed by team.
+
+    Several processes can share a db folder. Transactions hold an exclusive
+    flock on db/.lock, and every read first checks whether another process
+    changed the data: a JSON file's inode/mtime/size in snapshot mode, or
+    new records at the end of the journal in journaled mode. Readers never
+    take the write lock.
+
+    Within a process, the in-memory collections are guarded by one
+    reentrant lock that is only held for the duration of a single read or
+    write. In journaled mode, transactions of different threads run side
+    by side and each commits its own journal records; snapshot mode
+    rewrites whole files, so there one thread writes at a time.
+    """
+
+    # collection -> (field grouped on, field tallied within each group)
+    GROUP_KEYS = {"tasks": ("board_id", "status"), "boards": ("team_id", "status")}
+
+    SNAPSHOT_FORMATS = {"json": ".json", "binary": ".bin"}
+
+    def __init__(self, db_folder: str = "db", journaled: bool = False, snapshot_format: str = "json",
+                 mapped_tasks: bool = False, compact_records: bool = False, **journal_options):
+        """Initialize the storage engine and create the db folder if needed"""
+        super().__init__()
+        if snapshot_format not in self.SNAPSHOT_FORMATS:
+            raise ValueError(f"Snapshot format must be one of: {', '.join(self.SNAPSHOT_FORMATS)}")
+        if mapped_tasks and not journaled:
+            # Mapped records reach their file at compaction; the journal
+            # is what keeps them durable until then
+            raise ValueError("Mapped tasks require a journaled storage")
+        self.db_folder = db_folder
+        self.journaled = journaled
+        self.snapshot_format = snapshot_format
+        self._mapped = {"tasks"} if mapped_tasks else set()
+        self._compact = set()
+        if compact_records:
+            self._compact = set(compact_store.RECORD_LAYOUTS).union(compact_store.LIST_COLLECTIONS) - self._mapped
+        # Strings interned by the compact tables, shared by all collections
+        self._symbols = compact_store.Symbols()
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Optional[Tuple[int, int, int]]] = {}
+        self._dirty = set()
+        self._indexed = set()
+        # The indexes hold the surrogate numbers of ids (user_2 -> 2) rather
+        # than the strings; ids are spelled out again only when returned
+        self._surrogates = {c: SurrogateKeys(prefix) for c, prefix in self.ID_PREFIXES.items()}
+        self._unique: Dict[str, Dict[tuple, int]] = {}
+        # Ids in creation order, overall and per group, for paging and filters
+        self._order: Dict[str, array] = {}
+        self._groups: Dict[str, Dict[Any, array]] = {}
+        self._tallies: Dict[str, Dict[Any, Dict[Any, int]]] = {}
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        self._lock_file = None
+        # Threads of this process inside a transaction share the file lock
+        self._holders = 0
+        self._holders_guard = threading.Lock()
+        self._writer = threading.Lock()
+
+        if not os.path.exists(self.db_folder):
+            os.makedirs(self.db_folder)
+        self._lock_path = os.path.join(self.db_folder, ".lock")
+        self._manifest_path = os.path.join(self.db_folder, "commit.json")
+
+        self._journal = None
+        self._replayed: Dict[str, list] = {}
+        self._unsnapshotted = set()
+        if journaled:
+            self._journal = Journal(os.path.join(self.db_folder, "journal.log"), **journal_options)
+
+        with self._file_lock(exclusive=True):
+            self._recover_commit()
+            for collection in self._mapped:
+                self._convert_to_mapped(collection)
+            self._check_layout()
+            if journaled:
+                self._replay_journal()
+                self._journal.truncate_tail()
+
+    @property
+    def _undo(self) -> list:
+        """(collection, key, existed, old value) of the calling thread's uncommitted changes"""
+        if not hasattr(self._local, "undo"):
+            self._local.undo = []
+        return self._local.undo
+
+    @_undo.setter
+    def _undo(self, undo: list) -> None:
+        self._local.undo = undo
+
+    @property
+    def _pending(self) -> list:
+        """Journal operations of the calling thread's uncommitted changes"""
+        if not hasattr(self._local, "pending"):
+            self._local.pending = []
+        return self._local.pending
+
+    @_pending.setter
+    def _pending(self, pending: list) -> None:
+        self._local.pending = pending
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool, blocking: bool = True):
+        """Hold the flock of the db folder for a block; yields whether it was taken"""
+        if fcntl is None:
+            yield True
+            return
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        with open(self._lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, mode if blocking else mode | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _acquire(self) -> None:
+        """Take the write lock and catch up with other processes' commits"""
+        if not self.journaled:
+            self._writer.acquire()
+        try:
+            with self._holders_guard:
+                if self._holders == 0:
+                    if fcntl is not None:
+                        self._lock_file = open(self._lock_path, 'a')
+                        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                    # A process that crashed mid-commit left it to the next
+                    # writer, whoever that is, to roll forward
+                    self._recover_commit()
+                    if self.journaled:
+                        with self._lock:
+                            self._sync(locked=True)
+                            self._journal.truncate_tail()
+                self._holders += 1
+        except BaseException:
+            self._release_file_lock()
+            if not self.journaled:
+                self._writer.release()
+            raise
+
+    def _release(self) -> None:
+        """Release the write lock once the last thread's transaction ended"""
+        with self._holders_guard:
+            self._holders -= 1
+            if self._holders == 0:
+                self._release_file_lock()
+        if not self.journaled:
+            self._writer.release()
+
+    def _release_file_lock(self) -> None:
+        """Drop the flock taken by _acquire"""
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _replay_journal(self) -> None:
+        """Stash every journal record until its collection is loaded"""
+        for ops in self._journal.replay():
+            for op in ops:
+                self._replayed.setdefault(op[1], []).append(op)
+                self._unsnapshotted.add(op[1])
+
+    def _sync(self, locked: bool = False) -> None:
+        """Apply journal records that other processes appended"""
+        change = self._journal.changes()
+        if change == "none":
+            return
+
+        if change == "tail":
+            for ops in self._journal.read_tail():
+                for op in ops:
+                    self._unsnapshotted.add(op[1])
+                    if op[1] not in self._data:
+                        self._replayed.setdefault(op[1], []).append(op)
+                    elif op[0] == "put":
+                        self._set(op[1], op[2], op[3])
+                    elif op[2] in self._data[op[1]]:
+                        self._remove(op[1], op[2])
+            return
+
+        if locked:
+            self._reload()
+            return
+
+        # Reading the files while a writer compacts them could mix old and
+        # new state; until the lock is free, keep serving the current view
+        with self._file_lock(exclusive=False, blocking=False) as acquired:
+            if acquired:
+                self._reload()
+
+    def _reload(self) -> None:
+        """Another process compacted the journal: start over from the files"""
+        self._data.clear()
+        self._signatures.clear()
+        self._indexed.clear()
+        self._dirty.clear()
+        self._replayed = {}
+        self._unsnapshotted = set()
+        self._replay_journal()
+
+    def _path(self, collection: str) -> str:
+        """Return the snapshot file backing a collection"""
+        if collection in self._mapped:
+            return os.path.join(self.db_folder, f"{collection}.dat")
+        return os.path.join(self.db_folder, collection + self.SNAPSHOT_FORMATS[self.snapshot_format])
+
+    def _convert_to_mapped(self, collection: str) -> None:
+        """Move a collection from its snapshot file into a new record file"""
+        path = self._path(collection)
+        snapshot_path = os.path.join(self.db_folder, collection + self.SNAPSHOT_FORMATS[self.snapshot_format])
+        if not os.path.exists(snapshot_path):
+            if not os.path.exists(path):
+                # The record file also marks the folder as mapped
+                MappedStore.create(path, {})
+            return
+        # Both files only exist after a conversion cut short by a crash, in
+        # which case the record file is the newer one, or when a storage
+        # from before the layout check wrote the snapshot later
+        if not os.path.exists(path) or os.path.getmtime(snapshot_path) > os.path.getmtime(path):
+            MappedStore.create(path, _read_snapshot(snapshot_path, self.snapshot_format))
+        os.remove(snapshot_path)
+
+    def _check_layout(self) -> None:
+        """Refuse to work on a db folder whose tasks are kept the other way (mapped or not)"""
+        mapped = os.path.exists(os.path.join(self.db_folder, "tasks.dat"))
+        if mapped and "tasks" not in self._mapped:
+            raise ValueError(f"Tasks of '{self.db_folder}' are kept in tasks.dat, "
+                             "open it with mapped_tasks=True or convert it with convert_snapshots()")
+        if not mapped and "tasks" in self._mapped:
+            raise ValueError(f"Tasks of '{self.db_folder}' are no longer kept in tasks.dat, "
+                             "open it without mapped_tasks")
+
+    def _signature(self, path: str) -> Optional[Tuple[int, int, int]]:
+        """Return (inode, mtime, size) of a file, or None if it doesn't exist"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _collection(self, collection: str) -> Dict[str, Any]:
+        """Return the cached collection, reloading it if the file changed"""
+        if collection not in self.COLLECTIONS:
+            raise KeyError(f"Unknown collection '{collection}'")
+
+        with self._lock:
+            if self.journaled and not self._transaction_depth:
+                # Inside a transaction the write lock keeps other processes out
+                self._sync()
+
+            path = self._path(collection)
+            signature = self._signature(path)
+
+            if collection in self._data:
+                # The journaled snapshot only changes through our own compaction
+                if self.journaled or collection in self._dirty or signature == self._signatures.get(collection):
+                    return self._data[collection]
+
+            if collection in self._mapped:
+                self._check_layout()
+                data = MappedStore(path)
+            else:
+                data = {} if signature is None else _read_snapshot(path, self.snapshot_format)
+                if collection in self._compact:
+                    data = compact_store.compact(collection, data, self._symbols, self._surrogates)
+
+            for op in self._replayed.pop(collection, []):
+                self._apply(data, op)
+
+            if collection == "user_teams":
+                self._upgrade_user_teams(data)
+
+            self._data[collection] = data
+            self._signatures[collection] = signature
+            self._indexed.discard(collection)
+            return data
+
+    def _ensure_indexes(self, collection: str) -> None:
+        """Build the indexes of a collection on first use"""
+        data = self._collection(collection)
+        if collection in self._indexed:
+            return
+        if collection in self.UNIQUE_KEYS:
+            self._unique[collection] = {}
+            self._order[collection] = array('q')
+        if collection in self.GROUP_KEYS:
+            self._groups[collection] = {}
+            self._tallies[collection] = {}
+        for key, record in data.items():
+            self._index(collection, key, record)
+        self._indexed.add(collection)
+
+    def _index(self, collection: str, key: str, record: Any) -> None:
+        """Add a record to the indexes of its collection"""
+        number = self._surrogates[collection].number(key)
+        if collection in self.UNIQUE_KEYS:
+            unique_key = tuple(record.get(f) for f in self.UNIQUE_KEYS[collection])
+            self._unique[collection][unique_key] = number
+            _insert_ordered(self._order[collection], number)
+        if collection in self.GROUP_KEYS:
+            group_field, tally_field = self.GROUP_KEYS[collection]
+            group = record.get(group_field)
+            _insert_ordered(self._groups[collection].setdefault(group, array('q')), number)
+            self._count(collection, group, record.get(tally_field), 1)
+
+    def _unindex(self, collection: str, key: str, record: Any) -> None:
+        """Remove a record from the indexes of its collection"""
+        number = self._surrogates[collection].number(key)
+        if collection in self.UNIQUE_KEYS:
+            index = self._unique[collection]
+            unique_key = tuple(record.get(f) for f in self.UNIQUE_KEYS[collection])
+            if index.get(unique_key) == number:
+                del index[unique_key]
+            _discard_ordered(self._order[collection], number)
+        if collection in self.GROUP_KEYS:
+            group_field, tally_field = self.GROUP_KEYS[collection]
+            self._ungroup(collection, record.get(group_field), number)
+            self._count(collection, record.get(group_field), record.get(tally_field), -1)
+
+    def _reindex(self, collection: str, key: str, old: Any, new: Any) -> None:
+        """Move a replaced record in the indexes, touching only what changed"""
+        number = self._surrogates[collection].number(key)
+        if collection in self.UNIQUE_KEYS:
+            fields = self.UNIQUE_KEYS[collection]
+            old_key = tuple(old.get(f) for f in fields)
+            new_key = tuple(new.get(f) for f in fields)
+            if old_key != new_key:
+                index = self._unique[collection]
+                if index.get(old_key) == number:
+                    del index[old_key]
+                index[new_key] = number
+        if collection in self.GROUP_KEYS:
+            group_field, tally_field = self.GROUP_KEYS[collection]
+            old_group, new_group = old.get(group_field), new.get(group_field)
+            if old_group != new_group:
+                self._ungroup(collection, old_group, number)
+                _insert_ordered(self._groups[collection].setdefault(new_group, array('q')), number)
+            if (old_group, old.get(tally_field)) != (new_group, new.get(tally_field)):
+                self._count(collection, old_group, old.get(tally_field), -1)
+                self._count(collection, new_group, new.get(tally_field), 1)
+
+    def _ungroup(self, collection: str, group: Any, number: int) -> None:
+        """Drop an id's surrogate number from its group, and the group once it is empty"""
+        members = self._groups[collection].get(group)
+        if members is not None:
+            _discard_ordered(members, number)
+            if not members:
+                del self._groups[collection][group]
+
+    def _count(self, collection: str, group: Any, value: Any, delta: int) -> None:
+        """Adjust the tally of value within a group"""
+        tallies = self._tallies[collection]
+        tally = tallies.setdefault(group, {})
+        tally[value] = tally.get(value, 0) + delta
+        if tally[value] <= 0:
+            del tally[value]
+            if not tally:
+                del tallies[group]
+
+    def _upgrade_user_teams(self, data: Dict[str, Any]) -> None:
+        """Reduce user_teams entries written as team summaries to team ids"""
+        for user_id, teams in data.items():
+            if any(isinstance(team, dict) for team in teams):
+                data[user_id] = [team["id"] if isinstance(team, dict) else team for team in teams]
+
+    def _apply(self, data: Dict[str, Any], op: list) -> None:
+        """Apply one replayed journal operation to a collection"""
+        if op[0] == "put":
+            data[op[2]] = op[3]
+        elif op[0] == "delete":
+            data.pop(op[2], None)
+
+    def get(self, collection: str, key: str, default: Any = None) -> Any:
+        """Return a single record, or default if it doesn't exist"""
+        return self._collection(collection).get(key, default)
+
+    def contains(self, collection: str, key: str) -> bool:
+        """Check whether a record exists"""
+        return key in self._collection(collection)
+
+    def _set(self, collection: str, key: str, value: Any) -> None:
+        """Store a record in memory and keep the indexes in sync"""
+        data = self._collection(collection)
+        if collection in self.UNIQUE_KEYS or collection in self.GROUP_KEYS:
+            self._ensure_indexes(collection)
+            if key in data:
+                self._reindex(collection, key, data[key], value)
+            else:
+                self._index(collection, key, value)
+        data[key] = value
+        self._dirty.add(collection)
+
+    def _remove(self, collection: str, key: str) -> None:
+        """Drop a record from memory and from the indexes"""
+        data = self._collection(collection)
+        if collection in self.UNIQUE_KEYS or collection in self.GROUP_KEYS:
+            self._ensure_indexes(collection)
+            self._unindex(collection, key, data[key])
+        del data[key]
+        self._dirty.add(collection)
+
+    def put(self, collection: str, key: str, value: Any) -> None:
+        """Insert or replace a record; persisted on the next flush"""
+        with self._lock:
+            data = self._collection(collection)
+            # A sequence is never wound back: a concurrent transaction may
+            # already hold ids handed out after ours
+            if collection != "sequences":
+                self._undo.append((collection, key, key in data, data.get(key)))
+            self._set(collection, key, value)
+            if self.journaled:
+                self._pending.append(["put", collection, key, value])
+
+    def delete(self, collection: str, key: str) -> None:
+        """Remove a record if it exists; persisted on the next flush"""
+        with self._lock:
+            data = self._collection(collection)
+            if key in data:
+                self._undo.append((collection, key, True, data[key]))
+                self._remove(collection, key)
+                if self.journaled:
+                    self._pending.append(["delete", collection, key])
+
+    def rollback(self) -> None:
+        """Undo every put/delete the calling thread made since its last flush"""
+        with self._lock:
+            for collection, key, existed, value in reversed(self._undo):
+                if existed:
+                    self._set(collection, key, value)
+                elif key in self._collection(collection):
+                    self._remove(collection, key)
+            self._undo = []
+            self._pending = []
+            if not self.journaled:
+                # Collections changed by the rolled back transaction must be
+                # re-read from disk, not written back
+                self._dirty.clear()
+
+    def keys(self, collection: str) -> Iterable[str]:
+        """Return the ids of all records in a collection"""
+        with self._lock:
+            return list(self._collection(collection))
+
+    def scan(self, collection: str) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (id, record) pairs of a collection"""
+        # Iterate over a copy so other threads can write meanwhile
+        with self._lock:
+            return iter(list(self._collection(collection).items()))
+
+    def count(self, collection: str) -> int:
+        """Return the number of records in a collection"""
+        return len(self._collection(collection))
+
+    def _reader(self, collection: str, data: Dict[str, Any]):
+        """Return a function reading a record of a collection by the surrogate number of its id"""
+        if isinstance(data, compact_store.RecordTable):
+            # Compact tables find rows by the number, with no id to parse
+            return data.by_number
+        key = self._surrogates[collection].key
+        return lambda number: data[key(number)]
+
+    def find(self, collection: str, **fields) -> Optional[str]:
+        """Return the id of the first record matching all fields"""
+        unique_fields = self.UNIQUE_KEYS.get(collection)
+        if unique_fields is not None and set(fields) == set(unique_fields):
+            with self._lock:
+                self._ensure_indexes(collection)
+                number = self._unique[collection].get(tuple(fields[f] for f in unique_fields))
+                return None if number is None else self._surrogates[collection].key(number)
+
+        for key, _ in self.filter(collection, **fields):
+            return key
+        return None
+
+    def filter(self, collection: str, **fields) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (id, record) pairs matching all fields"""
+        with self._lock:
+            data = self._collection(collection)
+            group_field = self.GROUP_KEYS.get(collection, (None,))[0]
+            if group_field in fields:
+                self._ensure_indexes(collection)
+                members = self._groups[collection].get(fields[group_field], ())
+                read = self._reader(collection, data)
+                candidates = [(self._surrogates[collection].key(number), read(number)) for number in members]
+            else:
+                candidates = list(data.items())
+
+        return ((key, record) for key, record in candidates
+                if all(record.get(field) == value for field, value in fields.items()))
+
+    def page(self, collection: str, limit: int, after: Optional[str] = None,
+             **fields) -> Tuple[List[Tuple[str, Any]], Optional[str]]:
+        """Return up to limit matching records after the cursor, and the next cursor"""
+        if collection not in self.UNIQUE_KEYS:
+            raise KeyError(f"Collection '{collection}' cannot be paged")
+        with self._lock:
+            data = self._collection(collection)
+            if after is not None and after not in data:
+                raise ValueError(f"Invalid cursor '{after}'")
+            self._ensure_indexes(collection)
+            group_field = self.GROUP_KEYS.get(collection, (None,))[0]
+            if group_field in fields:
+                entries = self._groups[collection].get(fields[group_field], [])
+            else:
+                entries = self._order[collection]
+
+            # Seek straight to the cursor, then read just past one page
+            surrogates = self._surrogates[collection]
+            start = 0 if after is None else bisect_right(entries, surrogates.number(after))
+            items: List[Tuple[str, Any]] = []
+            read = self._reader(collection, data)
+            for index in range(start, len(entries)):
+                record = read(entries[index])
+                if all(record.get(field) == value for field, value in fields.items()):
+                    if len(items) == limit:
+                        return items, items[-1][0]
+                    items.append((surrogates.key(entries[index]), record))
+            return items, None
+
+    def page_list(self, collection: str, key: str, limit: int,
+                  start: int = 0) -> Tuple[List[str], Optional[int]]:
+        """Return up to limit ids of a list from position start on, and the next start"""
+        if collection not in compact_store.LIST_COLLECTIONS:
+            raise KeyError(f"Collection '{collection}' holds no lists")
+        with self._lock:
+            data = self._collection(collection)
+            # One id past the page tells whether there is a next one
+            if isinstance(data, compact_store.ListTable):
+                values = data.slice(key, start, start + limit + 1)
+            else:
+                values = data.get(key, [])[start:start + limit + 1]
+        return values[:limit], start + limit if len(values) > limit else None
+
+    def tally(self, collection: str, by: str, **fields) -> Dict[Any, int]:
+        """Count the records matching all fields, grouped by the value of by"""
+        group_field, tally_field = self.GROUP_KEYS.get(collection, (None, None))
+        if by == tally_field and set(fields) == {group_field}:
+            with self._lock:
+                self._ensure_indexes(collection)
+                return dict(self._tallies[collection].get(fields[group_field], {}))
+
+        counts: Dict[Any, int] = {}
+        for _, record in self.filter(collection, **fields):
+            counts[record.get(by)] = counts.get(record.get(by), 0) + 1
+        return counts
+
+    def _write_temp(self, collection: str, data: Dict[str, Any]) -> str:
+        """Write a collection to a durable temp file next to its snapshot file"""
+        tmp_path = self._path(collection) + ".tmp"
+        _write_snapshot_file(tmp_path, data, self.snapshot_format)
+        return tmp_path
+
+    def _write_snapshot(self, collection: str, data: Dict[str, Any]) -> None:
+        """Write a collection to its snapshot file"""
+        path = self._path(collection)
+        os.replace(self._write_temp(collection, data), path)
+        self._signatures[collection] = self._signature(path)
+
+    def _commit_snapshots(self, collections) -> None:
+        """Replace several snapshot files so that either all or none change"""
+        self._check_layout()
+        if len(collections) == 1:
+            self._write_snapshot(collections[0], self._data[collections[0]])
+            return
+
+        if os.path.exists(self._manifest_path):
+            # Overwriting it would lose the interrupted commit it records
+            raise RuntimeError(f"An interrupted commit in '{self.db_folder}' must be recovered first")
+
+        for collection in collections:
+            self._write_temp(collection, self._data[collection])
+
+        # From here on the commit is decided: recovery rolls it forward
+        manifest_tmp = self._manifest_path + ".tmp"
+        with open(manifest_tmp, 'w') as f:
+            json.dump(collections, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_tmp, self._manifest_path)
+
+        for collection in collections:
+            path = self._path(collection)
+            os.replace(path + ".tmp", path)
+            self._signatures[collection] = self._signature(path)
+        os.remove(self._manifest_path)
+
+    def _recover_commit(self) -> None:
+        """Finish a multi-file commit interrupted by a crash"""
+        if not os.path.exists(self._manifest_path):
+            return
+        with open(self._manifest_path, 'r') as f:
+            collections = json.load(f)
+        for collection in collections:
+            tmp_path = self._path(collection) + ".tmp"
+            if os.path.exists(tmp_path):
+                os.replace(tmp_path, self._path(collection))
+        os.remove(self._manifest_path)
+
+    def flush(self) -> None:
+        """Persist every modification made since the last flush"""
+        if self._transaction_depth:
+            return
+
+        if not self.journaled:
+            if self._dirty:
+                self._commit_snapshots(sorted(self._dirty))
+                self._dirty.clear()
+            self._undo = []
+            return
+
+        with self._lock:
+            ops = self._pending
+            if ops:
+                self._journal.append(ops)
+                self._pending = []
+            self._undo = []
+            # Only this thread's records are committed; collections other
+            # threads are still changing stay out of the snapshot list
+            self._unsnapshotted.update(op[1] for op in ops)
+            due = self._journal.should_compact()
+
+        if due:
+            self.compact(wait=False)
+
+    def compact(self, wait: bool = True) -> None:
+        """Fold the journal back into the snapshot files"""
+        if not self.journaled:
+            return
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact_now, name="storage-compactor")
+                self._compactor.start()
+            compactor = self._compactor
+        if wait:
+            compactor.join()
+
+    def _compact_now(self) -> None:
+        """Rotate the journal and rewrite the snapshots under the write lock"""
+        with self._file_lock(exclusive=True):
+            # No transaction of any thread or process is running now, so
+            # the in-memory state holds committed data only
+            with self._lock:
+                # Another process may have switched the folder's task layout
+                self._check_layout()
+                self._sync(locked=True)
+                self._journal.truncate_tail()
+                # Records appended from here on go to a fresh journal file
+                self._journal.rotate()
+                snapshots = {c: dict(self._collection(c)) for c in sorted(self._unsnapshotted - self._mapped)}
+                # Mapped collections only append their changes, so those are
+                # written right here
+                for collection in sorted(self._unsnapshotted & self._mapped):
+                    self._collection(collection).checkpoint()
+                self._unsnapshotted = set()
+            for collection, data in snapshots.items():
+                self._write_snapshot(collection, data)
+            self._journal.discard_rotated()
+
+
+BACKENDS = ("json", "journal", "mapped", "sqlite")
+
+_instances: Dict[str, Tuple[str, StorageBase]] = {}
+
+
+def open_storage(db_folder: str = "db", backend: str = "json", **options) -> StorageBase:
+    """Create a new storage engine of the given backend over a db folder"""
+    if backend == "json":
+        return JsonStorage(db_folder, **options)
+    if backend == "journal":
+        return JsonStorage(db_folder, journaled=True, **options)
+    if backend == "mapped":
+        return JsonStorage(db_folder, journaled=True, mapped_tasks=True, **options)
+    if backend == "sqlite":
+        return SqliteStorage(db_folder, **options)
+    raise ValueError(f"Backend must be one of: {', '.join(BACKENDS)}")
+
+
+def get_storage(db_folder: str = "db", backend: str = "json", **options) -> StorageBase:
+    """Return the shared storage for a db folder, creating it on first use"""
+    path = os.path.abspath(db_folder)
+    if path not in _instances:
+        _instances[path] = (backend, open_storage(db_folder, backend, **options))
+    elif _instances[path][0] != backend:
+        raise ValueError(f"Storage for '{db_folder}' is already open with the '{_instances[path][0]}' backend")
+    return _instances[path][1]
+
+
+def convert_snapshots(db_folder: str = "db", snapshot_format: str = "binary") -> Dict[str, int]:
+    """
+    Write every collection of a db folder in the given snapshot format
+    ("binary" or "json") from its files in the other one, e.g. to switch a
+    db folder to binary snapshots or to get JSON copies to inspect. The
+    source files are left in place, except tasks.dat: the tasks of a mapped
+    folder are written to a snapshot too, which makes it a plain folder
+    again. Returns the number of records converted per collection.
+    """
+    if snapshot_format not in JsonStorage.SNAPSHOT_FORMATS:
+        raise ValueError(f"Snapshot format must be one of: {', '.join(JsonStorage.SNAPSHOT_FORMATS)}")
+    source_format = "json" if snapshot_format == "binary" else "binary"
+    # Opening the source storage finishes any interrupted commit first
+    source = _open_source(db_folder, source_format)
+
+    converted = {}
+    with source._file_lock(exclusive=True):
+        for collection in StorageBase.COLLECTIONS:
+            # A collection may so far exist only in the journal
+            if os.path.exists(source._path(collection)) or source.count(collection):
+                data = dict(source.scan(collection))
+                path = os.path.join(db_folder, collection + JsonStorage.SNAPSHOT_FORMATS[snapshot_format])
+                _write_snapshot_file(path + ".tmp", data, snapshot_format)
+                os.replace(path + ".tmp", path)
+                converted[collection] = len(data)
+        for collection in source._mapped:
+            # The snapshot just written is now the only copy
+            os.remove(source._path(collection))
+    return converted
+
+
+def _open_source(db_folder: str, snapshot_format: str = "json") -> JsonStorage:
+    """
+    Open a db folder to copy it elsewhere, with its mapped tasks if it has
+    them. It is always opened journaled: records still in journal.log, not
+    yet compacted into the snapshots, must be copied too, and replaying a
+    folder that has no journal changes nothing.
+    """
+    mapped = os.path.exists(os.path.join(db_folder, "tasks.dat"))
+    return JsonStorage(db_folder, journaled=True, snapshot_format=snapshot_format, mapped_tasks=mapped)
+
+
+def migrate_json_to_sqlite(db_folder: str = "db") -> Dict[str, int]:
+    """
+    One-shot copy of the JSON files of a db folder into its SQLite database.
+    Returns the number of records migrated per collection.
+    """
+    source = _open_source(db_folder)
+    target = SqliteStorage(db_folder)
+    for collection in StorageBase.COLLECTIONS:
+        if target.count(collection):
+            target.close()
+            raise ValueError(f"SQLite collection '{collection}' is not empty, migration already done")
+
+    migrated = {}
+    for collection in StorageBase.COLLECTIONS:
+        for key, value in source.scan(collection):
+            target.put(collection, key, value)
+        migrated[collection] = source.count(collection)
+    target.flush()
+    target.close()
+    return migrated
@@ -0,0 +1,359 @@
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Page sizes of the list APIs when a request asks for pages
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class StorageBase:
+    """
+    Persistence interface shared by the User, Team and ProjectBoard managers.
+
+    Data is organised in collections of records keyed by id:
+      * users, teams, boards, tasks: id -> record dict
+      * team_members: team id -> list of member user ids
+      * user_teams: user id -> list of team ids (reverse of team_members)
+      * sequences: id prefix -> last number handed out by next_id()
+        and "<board id>:<section>" -> export version of a board report section
+    Mutations become durable on flush(). Several mutations, possibly made
+    through different managers sharing the storage, can be grouped with
+    transaction() so they are committed or rolled back together.
+
+    A storage can be shared by many threads. Transactions are tracked per
+    thread, and a transaction locks the entities it works on with lock(),
+    so threads updating different boards or teams don't wait on each other.
+    """
+
+    COLLECTIONS = ("users", "teams", "boards", "tasks", "team_members", "user_teams", "sequences")
+
+    # Seconds lock() waits for another thread before giving up
+    LOCK_TIMEOUT = 30
+
+    ID_PREFIXES = {"users": "user", "teams": "team", "boards": "board", "tasks": "task"}
+
+    # Fields that must be unique together within a collection
+    UNIQUE_KEYS = {
+        "users": ("name",),
+        "teams": ("name",),
+        "boards": ("team_id", "name"),
+        "tasks": ("board_id", "title"),
+    }
+
+    def __init__(self):
+        """Set up the per-thread transaction state and the entity lock table"""
+        self._local = threading.local()
+        # entity -> [lock, number of threads holding or waiting for it]
+        self._entity_locks: Dict[Any, list] = {}
+        self._entity_locks_guard = threading.Lock()
+        self._sequence_lock = threading.Lock()
+
+    @property
+    def _transaction_depth(self) -> int:
+        """Depth of nested transaction() blocks in the calling thread; flush() is deferred while > 0"""
+        return getattr(self._local, "depth", 0)
+
+    @_transaction_depth.setter
+    def _transaction_depth(self, depth: int) -> None:
+        self._local.depth = depth
+
+    # read a single record
+    def get(self, collection: str, key: str, default: Any = None) -> Any:
+        """
+        :return: the record stored under key, or default if there is none
+        """
+        pass
+
+    # check that a record exists
+    def contains(self, collection: str, key: str) -> bool:
+        pass
+
+    # insert or replace a record
+    def put(self, collection: str, key: str, value: Any) -> None:
+        pass
+
+    # remove a record
+    def delete(self, collection: str, key: str) -> None:
+        pass
+
+    # all ids of a collection
+    def keys(self, collection: str) -> Iterable[str]:
+        pass
+
+    # all (id, record) pairs of a collection in insertion order
+    def scan(self, collection: str) -> Iterator[Tuple[str, Any]]:
+        pass
+
+    # number of records in a collection
+    def count(self, collection: str) -> int:
+        pass
+
+    # lookup by field values
+    def find(self, collection: str, **fields) -> Optional[str]:
+        """
+        :return: the id of the first record whose fields equal the given
+                 values, or None. Used for the uniqueness constraints, e.g.
+                 find("boards", team_id="team_1", name="Sprint 1")
+        """
+        pass
+
+    # filter by field values
+    def filter(self, collection: str, **fields) -> Iterator[Tuple[str, Any]]:
+        """
+        :return: (id, record) pairs whose fields equal the given values
+        """
+        pass
+
+    # count by field value
+    def tally(self, collection: str, by: str, **fields) -> Dict[Any, int]:
+        """
+        :return: number of records matching the given fields per value of by,
+                 e.g. tally("tasks", "status", board_id="board_1")
+                 -> {"OPEN": 2, "COMPLETE": 5}
+        """
+        pass
+
+    # one page of a record collection in id order
+    def page(self, collection: str, limit: int, after: Optional[str] = None,
+             **fields) -> Tuple[List[Tuple[str, Any]], Optional[str]]:
+        """
+        :return: up to limit (id, record) pairs matching the given fields
+                 whose id comes after the cursor after, and the cursor of
+                 the next page (None on the last page), e.g.
+                 page("boards", 50, "board_120", team_id="team_1")
+                 Raises ValueError if after is not an id of the collection.
+        """
+        pass
+
+    # one page of an id list
+    def page_list(self, collection: str, key: str, limit: int,
+                  start: int = 0) -> Tuple[List[str], Optional[int]]:
+        """
+        :return: up to limit ids of the list stored under key in team_members
+                 or user_teams, from position start on, and the position the
+                 next page starts at (None on the last page), e.g.
+                 page_list("team_members", "team_1", 50, 100)
+        """
+        pass
+
+    def stream(self, collection: str, batch_size: int = MAX_PAGE_SIZE,
+               **fields) -> Iterator[Tuple[str, Any]]:
+        """
+        Iterate over the records page() returns for fields, one batch at a
+        time, so memory stays flat however large the collection is
+        """
+        items, cursor = self.page(collection, batch_size, **fields)
+        while True:
+            yield from items
+            if cursor is None:
+                return
+            items, cursor = self.page(collection, batch_size, cursor, **fields)
+
+    # make all mutations durable
+    def flush(self) -> None:
+        pass
+
+    # discard all mutations made since the last flush
+    def rollback(self) -> None:
+        pass
+
+    # take the write lock shared with other processes using the db folder
+    def _acquire(self) -> None:
+        pass
+
+    # release the write lock
+    def _release(self) -> None:
+        pass
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group mutations into one atomic commit, e.g.
+
+            with storage.transaction():
+                team_manager.create_team(...)
+                board_manager.create_board(...)
+
+        The managers' own flush() calls are deferred until the outermost
+        block exits; everything is then committed at once. If the block
+        raises, every change made inside it is rolled back. Nested blocks
+        join the outer transaction.
+
+        The outermost block holds the write lock of the db folder, so
+        transactions from different processes are serialized and each one
+        validates against the latest committed data.
+        """
+        if self._transaction_depth == 0:
+            self._acquire()
+            self._local.held = {}
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                try:
+                    self.rollback()
+                finally:
+                    self._release()
+                    self._unlock_entities()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            try:
+                self.flush()
+            except BaseException:
+                self.rollback()
+                raise
+            finally:
+                self._release()
+                self._unlock_entities()
+
+    def lock(self, *entities) -> None:
+        """
+        Lock entities for the rest of the calling thread's transaction, e.g.
+
+            storage.lock(("boards", "board_1"))
+
+        Other threads locking the same entity wait until the transaction
+        is committed or rolled back, so a read-validate-write sequence on
+        one board can't interleave with another on the same board. Entities
+        passed together are locked in a fixed order. Successive calls lock
+        in call order, so a caller locking several entities in one
+        transaction must pass them to a single call, or otherwise take them
+        in the same order everywhere, or it can deadlock with another
+        thread until LOCK_TIMEOUT.
+        """
+        if self._transaction_depth == 0:
+            raise RuntimeError("lock() must be called inside a transaction")
+
+        held = self._local.held
+        for entity in sorted(set(entities) - set(held), key=repr):
+            with self._entity_locks_guard:
+                entry = self._entity_locks.setdefault(entity, [threading.Lock(), 0])
+                entry[1] += 1
+            if not entry[0].acquire(timeout=self.LOCK_TIMEOUT):
+                self._drop_entity_lock(entity, entry)
+                raise TimeoutError(f"Timed out waiting for the lock on {entity}")
+            held[entity] = entry
+
+    def _unlock_entities(self) -> None:
+        """Release every entity lock of the calling thread's transaction"""
+        for entity, entry in self._local.held.items():
+            entry[0].release()
+            self._drop_entity_lock(entity, entry)
+        self._local.held = {}
+
+    def _drop_entity_lock(self, entity: Any, entry: list) -> None:
+        """Forget an entity lock once no thread holds or waits for it"""
+        with self._entity_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._entity_locks[entity]
+
+    def next_id(self, collection: str) -> str:
+        """
+        Allocate the next id of a collection, e.g. "task_42".
+
+        The counter lives in the sequences collection and is flushed together
+        with the new record, so ids are never reused, even after the highest
+        record is deleted. It is seeded once from the existing keys.
+        """
+        return self.next_ids(collection, 1)[0]
+
+    def next_ids(self, collection: str, count: int) -> List[str]:
+        """Allocate count consecutive ids with a single sequence update"""
+        prefix = self.ID_PREFIXES[collection]
+        with self._sequence_lock:
+            current = self.get("sequences", prefix)
+            if current is None:
+                numbers = (parse_id(prefix, key) for key in self.keys(collection))
+                current = max((number for number in numbers if number is not None), default=0)
+
+            ids = []
+            while len(ids) < count:
+                current += 1
+                # Skip numbers taken behind the counter's back (hand-edited
+                # files, or a concurrent transaction that was rolled back)
+                if not self.contains(collection, f"{prefix}_{current}"):
+                    ids.append(f"{prefix}_{current}")
+
+            self.put("sequences", prefix, current)
+        return ids
+
+
+# Largest number of a generated id; the indexes keep them in int64 arrays
+MAX_ID_NUMBER = 2 ** 63 - 1
+
+
+def parse_id(prefix: str, key: str) -> Optional[int]:
+    """Return N of a generated id "<prefix>_N", or None for a key of any other shape or past MAX_ID_NUMBER"""
+    head, _, number = key.rpartition('_')
+    # Leading zeros would give two ids the same number
+    if head != prefix or not (number.isascii() and number.isdigit()) or (number[0] == "0" and len(number) > 1):
+        return None
+    number = int(number)
+    return number if number <= MAX_ID_NUMBER else None
+
+
+class SurrogateKeys:
+    """
+    Integer stand-ins for the ids of one collection, used inside the storage
+    so indexes hold machine ints instead of strings. A generated id such as
+    "task_42" stands for 42, so the ids come back out as strings only at the
+    API boundary. Any other key (e.g. from a hand-edited file) is given a
+    negative number the first time it is stored, which sorts it before every
+    generated id.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._others: Dict[str, int] = {}
+        self._other_keys: List[str] = []
+
+    def lookup(self, key: str) -> Optional[int]:
+        """Return the number standing for key, or None if it has none yet"""
+        number = parse_id(self.prefix, key)
+        return self._others.get(key) if number is None else number
+
+    def number(self, key: str) -> int:
+        """Return the number standing for key, assigning one if needed"""
+        number = self.lookup(key)
+        if number is None:
+            self._other_keys.append(key)
+            number = self._others[key] = -len(self._other_keys)
+        return number
+
+    def key(self, number: int) -> str:
+        """Return the id a number stands for"""
+        return f"{self.prefix}_{number}" if number >= 0 else self._other_keys[-number - 1]
+
+
+def page_request(req_data: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Read the limit and cursor of a list request. limit is None when the
+    request asks for neither, meaning the whole list in one response.
+    """
+    limit = req_data.get("limit")
+    cursor = req_data.get("cursor")
+    if limit is None and cursor is None:
+        return None, None
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be an integer between 1 and {MAX_PAGE_SIZE}")
+    if cursor is not None and not isinstance(cursor, str):
+        raise ValueError("Cursor must be a string")
+    return limit, cursor
+
+
+def transactional(method):
+    """Run a manager method inside a transaction of its storage"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.storage.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -1,92 +1,26 @@
 import json
-import os
 from datetime import datetime
+from .storage import get_storage
+from .storage_base import page_request, transactional
 from .team_base import TeamBase
 
 
 class Team(TeamBase):
     """
     Concrete implementation of TeamBase for managing teams.
-    Uses JSON file storage in the db folder.
+    Uses the shared storage engine over the db folder.
     """
     
-    def __init__(self):
+    def __init__(self, storage=None, backend="json"):
         """Initialize the Team class"""
-        self.db_folder = "db"
-        self.teams_file = os.path.join(self.db_folder, "teams.json")
-        self.team_members_file = os.path.join(self.db_folder, "team_members.json")
-        self.users_file = os.path.join(self.db_folder, "users.json")
-        self.user_teams_file = os.path.join(self.db_folder, "user_teams.json")
-        
-        # Create db folder if it doesn't exist
-        if not os.path.exists(self.db_folder):
-            os.makedirs(self.db_folder)
-        
-        self._initialize_files()
-    
-    def _initialize_files(self):
-        """Create empty JSON files if they don't exist"""
-        if not os.path.exists(self.teams_file):
-            with open(self.teams_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.team_members_file):
-            with open(self.team_members_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.user_teams_file):
-            with open(self.user_teams_file, 'w') as f:
-                json.dump({}, f)
-    
-    def _load_teams(self):
-        """Load all teams from JSON file"""
-        with open(self.teams_file, 'r') as f:
-            return json.load(f)
-    
-    def _save_teams(self, teams):
-        """Save teams to JSON file"""
-        with open(self.teams_file, 'w') as f:
-            json.dump(teams, f, indent=2)
-    
-    def _load_team_members(self):
-        """Load team members mapping"""
-        with open(self.team_members_file, 'r') as f:
-            return json.load(f)
-    
-    def _save_team_members(self, team_members):
-        """Save team members mapping"""
-        with open(self.team_members_file, 'w') as f:
-            json.dump(team_members, f, indent=2)
-    
-    def _load_users(self):
-        """Load users to verify they exist"""
-        if not os.path.exists(self.users_file):
-            return {}
-        with open(self.users_file, 'r') as f:
-            return json.load(f)
-    
-    def _load_user_teams(self):
-        """Load user-teams mapping"""
-        with open(self.user_teams_file, 'r') as f:
-            return json.load(f)
+        self.storage = storage or get_storage("db", backend)
+        self.db_folder = self.storage.db_folder
     
-    def _save_user_teams(self, user_teams):
-        """Save user-teams mapping"""
-        with open(self.user_teams_file, 'w') as f:
-            json.dump(user_teams, f, indent=2)
-    
-    def _generate_team_id(self, teams):
-        """Generate a unique team ID"""
-        if not teams:
-            return "team_1"
-        
-        max_num = 0
-        for team_id in teams.keys():
-            num = int(team_id.split('_')[1])
-            max_num = max(max_num, num)
-        
-        return f"team_{max_num + 1}"
+    def _generate_team_id(self):
+        """Generate a unique team ID from the persisted sequence"""
+        return self.storage.next_id("teams")
     
+    @transactional
     def create_team(self, request: str) -> str:
         """
         Create a new team
@@ -120,18 +54,16 @@ class Team(TeamBase):
             if len(description) > 128:
                 raise ValueError("Description cannot exceed 128 characters")
             
+            # Hold the name until commit, and the admin whose teams change
+            self.storage.lock(("team_names", name), ("users", admin))
             
-            users = self._load_users()
-            if admin not in users:
+            if not self.storage.contains("users", admin):
                 raise ValueError(f"Admin user '{admin}' does not exist")
             
-            teams = self._load_teams()
+            if self.storage.find("teams", name=name) is not None:
+                raise ValueError(f"Team with name '{name}' already exists")
             
-            for team_id, team_data in teams.items():
-                if team_data["name"] == name:
-                    raise ValueError(f"Team with name '{name}' already exists")
-            
-            team_id = self._generate_team_id(teams)
+            team_id = self._generate_team_id()
             
             team_data = {
                 "name": name,
@@ -140,24 +72,12 @@ class Team(TeamBase):
                 "admin": admin
             }
             
-            teams[team_id] = team_data
-            self._save_teams(teams)
-            
-            team_members = self._load_team_members()
-            team_members[team_id] = [admin]  
-            self._save_team_members(team_members)
+            self.storage.put("teams", team_id, team_data)
+            self.storage.put("team_members", team_id, [admin])
             
-            user_teams = self._load_user_teams()
-            if admin not in user_teams:
-                user_teams[admin] = []
-            
-            user_teams[admin].append({
-                "id": team_id,
-                "name": name,
-                "description": description,
-                "creation_time": team_data["creation_time"]
-            })
-            self._save_user_teams(user_teams)
+            admin_teams = list(self.storage.get("user_teams", admin, []))
+            admin_teams.append(team_id)
+            self.storage.put("user_teams", admin, admin_teams)
             
             return json.dumps({"id": team_id})
         
@@ -166,21 +86,54 @@ class Team(TeamBase):
         except Exception as e:
             raise Exception(f"Error creating team: {str(e)}")
     
-    def list_teams(self) -> str:
-        """List all teams"""
-        teams = self._load_teams()
-        team_list = []
+    def _summarize_team(self, team_id, team_data):
+        """Return the fields of a team shown by the list APIs"""
+        return {
+            "id": team_id,
+            "name": team_data["name"],
+            "description": team_data["description"],
+            "creation_time": team_data["creation_time"],
+            "admin": team_data["admin"]
+        }
+    
+    def list_teams(self, request: str = None) -> str:
+        """
+        List all teams
         
-        for team_id, team_data in teams.items():
-            team_list.append({
-                "id": team_id,
-                "name": team_data["name"],
-                "description": team_data["description"],
-                "creation_time": team_data["creation_time"],
-                "admin": team_data["admin"]
-            })
+        A request with a limit, a cursor or both returns one page:
+        {
+          "limit": 100,
+          "cursor": "team_100"
+        }
+        -> {"items": [...], "next_cursor": "team_200"}
+        """
+        try:
+            limit, cursor = page_request(json.loads(request) if request else {})
+            if limit is None:
+                records, next_cursor = self.storage.scan("teams"), None
+            else:
+                records, next_cursor = self.storage.page("teams", limit, cursor)
+            
+            team_list = [self._summarize_team(team_id, team_data) for team_id, team_data in records]
+            
+            if limit is None:
+                return json.dumps(team_list, indent=2)
+            return json.dumps({"items": team_list, "next_cursor": next_cursor}, indent=2)
         
-        return json.dumps(team_list, indent=2)
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error listing teams: {str(e)}")
+    
+    def iter_teams(self):
+        """Yield every team as a dict, reading the storage a page at a time"""
+        for team_id, team_data in self.storage.stream("teams"):
+            yield self._summarize_team(team_id, team_data)
+    
+    def stream_teams(self):
+        """Yield every team as one line of newline-delimited JSON"""
+        for team in self.iter_teams():
+            yield json.dumps(team) + "\n"
     
     def describe_team(self, request: str) -> str:
         """
@@ -198,18 +151,19 @@ class Team(TeamBase):
             if not team_id:
                 raise ValueError("Team ID is required")
             
-            teams = self._load_teams()
+            team_data = self.storage.get("teams", team_id)
             
-            if team_id not in teams:
+            if team_data is None:
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
-            return json.dumps(teams[team_id], indent=2)
+            return json.dumps(team_data, indent=2)
         
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in request")
         except Exception as e:
             raise Exception(f"Error describing team: {str(e)}")
     
+    @transactional
     def update_team(self, request: str) -> str:
         """
         Update team details
@@ -232,42 +186,54 @@ class Team(TeamBase):
             if not team_id:
                 raise ValueError("Team ID is required")
             
-            teams = self._load_teams()
+            entities = [("teams", team_id)]
+            if "name" in team_updates:
+                entities.append(("team_names", team_updates["name"]))
+            if isinstance(team_updates.get("admin"), str):
+                entities.append(("users", team_updates["admin"]))
+            self.storage.lock(*entities)
+            
+            team_data = self.storage.get("teams", team_id)
             
-            if team_id not in teams:
+            if team_data is None:
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
+            # Work on a copy so a rejected update never touches the cache
+            team_data = dict(team_data)
+            
             if "name" in team_updates:
                 new_name = team_updates["name"]
                 if len(new_name) > 64:
                     raise ValueError("Team name cannot exceed 64 characters")
                 
-                for tid, tdata in teams.items():
-                    if tid != team_id and tdata["name"] == new_name:
-                        raise ValueError(f"Team with name '{new_name}' already exists")
+                existing_id = self.storage.find("teams", name=new_name)
+                if existing_id is not None and existing_id != team_id:
+                    raise ValueError(f"Team with name '{new_name}' already exists")
                 
-                teams[team_id]["name"] = new_name
+                team_data["name"] = new_name
             
             if "description" in team_updates:
                 new_desc = team_updates["description"]
                 if len(new_desc) > 128:
                     raise ValueError("Description cannot exceed 128 characters")
-                teams[team_id]["description"] = new_desc
+                team_data["description"] = new_desc
             
             if "admin" in team_updates:
                 new_admin = team_updates["admin"]
-                users = self._load_users()
-                if new_admin not in users:
+                if not self.storage.contains("users", new_admin):
                     raise ValueError(f"Admin user '{new_admin}' does not exist")
                 
-                team_members = self._load_team_members()
-                if new_admin not in team_members.get(team_id, []):
-                    team_members[team_id].append(new_admin)
-                    self._save_team_members(team_members)
+                members = self.storage.get("team_members", team_id, [])
+                if new_admin not in members:
+                    self.storage.put("team_members", team_id, members + [new_admin])
+                    admin_teams = list(self.storage.get("user_teams", new_admin, []))
+                    if team_id not in admin_teams:
+                        admin_teams.append(team_id)
+                        self.storage.put("user_teams", new_admin, admin_teams)
                 
-                teams[team_id]["admin"] = new_admin
+                team_data["admin"] = new_admin
             
-            self._save_teams(teams)
+            self.storage.put("teams", team_id, team_data)
             
             return json.dumps({"message": "Team updated successfully"})
         
@@ -276,9 +242,12 @@ class Team(TeamBase):
         except Exception as e:
             raise Exception(f"Error updating team: {str(e)}")
     
+    @transactional
     def add_users_to_team(self, request: str):
         """
-        Add users to a team
+        Add users to a team. There is no limit on the number of users; the
+        request is validated as a whole first, so either every user is added
+        or none is.
         
         Example request:
         {
@@ -297,43 +266,32 @@ class Team(TeamBase):
             if not user_ids:
                 raise ValueError("At least one user ID is required")
             
-            if len(user_ids) > 50:
-                raise ValueError("Cannot add more than 50 users at once")
+            # Drop repeated ids while keeping the request order
+            user_ids = list(dict.fromkeys(user_ids))
             
-            teams = self._load_teams()
-            if team_id not in teams:
+            # The team's member list and each user's team list change
+            self.storage.lock(("teams", team_id), *(("users", user_id) for user_id in user_ids))
+            
+            team_data = self.storage.get("teams", team_id)
+            if team_data is None:
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
-            users = self._load_users()
             for user_id in user_ids:
-                if user_id not in users:
+                if not self.storage.contains("users", user_id):
                     raise ValueError(f"User '{user_id}' does not exist")
             
-            team_members = self._load_team_members()
-            if team_id not in team_members:
-                team_members[team_id] = []
+            members = list(self.storage.get("team_members", team_id, []))
+            member_set = set(members)
+            new_members = [user_id for user_id in user_ids if user_id not in member_set]
+            members.extend(new_members)
             
-            team_data = teams[team_id]
-            user_teams = self._load_user_teams()
+            for user_id in new_members:
+                user_teams = list(self.storage.get("user_teams", user_id, []))
+                if team_id not in user_teams:
+                    user_teams.append(team_id)
+                    self.storage.put("user_teams", user_id, user_teams)
             
-            for user_id in user_ids:
-                if user_id not in team_members[team_id]:
-                    team_members[team_id].append(user_id)
-                    
-                    if user_id not in user_teams:
-                        user_teams[user_id] = []
-                    
-                    team_exists = any(t["id"] == team_id for t in user_teams[user_id])
-                    if not team_exists:
-                        user_teams[user_id].append({
-                            "id": team_id,
-                            "name": team_data["name"],
-                            "description": team_data["description"],
-                            "creation_time": team_data["creation_time"]
-                        })
-            
-            self._save_team_members(team_members)
-            self._save_user_teams(user_teams)
+            self.storage.put("team_members", team_id, members)
             
             return json.dumps({"message": "Users added to team successfully"})
         
@@ -342,9 +300,11 @@ class Team(TeamBase):
         except Exception as e:
             raise Exception(f"Error adding users to team: {str(e)}")
     
+    @transactional
     def remove_users_from_team(self, request: str):
         """
-        Remove users from a team
+        Remove users from a team. Nothing is removed if any of the users is
+        the team admin.
         
         Example request:
         {
@@ -363,29 +323,25 @@ class Team(TeamBase):
             if not user_ids:
                 raise ValueError("At least one user ID is required")
             
-            teams = self._load_teams()
-            if team_id not in teams:
+            self.storage.lock(("teams", team_id), *(("users", user_id) for user_id in user_ids))
+            
+            team_data = self.storage.get("teams", team_id)
+            if team_data is None:
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
-            team_members = self._load_team_members()
-            if team_id not in team_members:
-                team_members[team_id] = []
+            members = self.storage.get("team_members", team_id, [])
+            removed = set(user_ids).intersection(members)
             
-            user_teams = self._load_user_teams()
+            if team_data["admin"] in removed:
+                raise ValueError(f"Cannot remove admin user '{team_data['admin']}' from team")
             
-            for user_id in user_ids:
-                if user_id in team_members[team_id]:
-
-                    if user_id == teams[team_id]["admin"]:
-                        raise ValueError(f"Cannot remove admin user '{user_id}' from team")
-                    
-                    team_members[team_id].remove(user_id)
-                    
-                    if user_id in user_teams:
-                        user_teams[user_id] = [t for t in user_teams[user_id] if t["id"] != team_id]
+            members = [user_id for user_id in members if user_id not in removed]
             
-            self._save_team_members(team_members)
-            self._save_user_teams(user_teams)
+            self.storage.put("team_members", team_id, members)
+            for user_id in removed:
+                user_teams = self.storage.get("user_teams", user_id)
+                if user_teams is not None:
+                    self.storage.put("user_teams", user_id, [t for t in user_teams if t != team_id])
             
             return json.dumps({"message": "Users removed from team successfully"})
         
@@ -400,36 +356,55 @@ class Team(TeamBase):
         
         Example request:
         {
-          "id": "team_1"
+          "id": "team_1",
+          "limit": 50,
+          "cursor": "50"
         }
+        limit and cursor are optional; with either, the response is a page
+        {"items": [...], "next_cursor": ...} in membership order. The cursor
+        is a position in the member list, so it stays valid when members are
+        removed mid-walk; a removal ahead of it moves the later members back
+        a place, so the walk can pass over one of them.
         """
         try:
             req_data = json.loads(request)
             team_id = req_data.get("id")
+            limit, cursor = page_request(req_data)
             
             if not team_id:
                 raise ValueError("Team ID is required")
             
-            teams = self._load_teams()
-            if team_id not in teams:
+            if not self.storage.contains("teams", team_id):
                 raise ValueError(f"Team with ID '{team_id}' not found")
             
-            team_members = self._load_team_members()
-            member_ids = team_members.get(team_id, [])
+            next_cursor = None
+            if limit is None:
+                member_ids = self.storage.get("team_members", team_id, [])
+            else:
+                start = 0
+                if cursor is not None:
+                    if not (cursor.isascii() and cursor.isdigit()):
+                        raise ValueError(f"Invalid cursor '{cursor}'")
+                    start = int(cursor)
+                # Only the page's slice of the member list is read
+                member_ids, next_start = self.storage.page_list("team_members", team_id, limit, start)
+                if next_start is not None:
+                    next_cursor = str(next_start)
             
-            users = self._load_users()
             user_list = []
             
             for user_id in member_ids:
-                if user_id in users:
-                    user_data = users[user_id]
+                user_data = self.storage.get("users", user_id)
+                if user_data is not None:
                     user_list.append({
                         "id": user_id,
                         "name": user_data["name"],
                         "display_name": user_data["display_name"]
                     })
             
-            return json.dumps(user_list, indent=2)
+            if limit is None:
+                return json.dumps(user_list, indent=2)
+            return json.dumps({"items": user_list, "next_cursor": next_cursor}, indent=2)
         
         except json.JSONDecodeError:
             raise ValueError("Invalid JSON format in request")
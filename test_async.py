@@ -0,0 +1,128 @@
+"""
+Test file for the asyncio API
+
+To run: python test_async.py
+"""
+
+from planner.async_api import AsyncProjectBoard, AsyncTeam, AsyncUser
+from planner.storage import JsonStorage
+import asyncio
+import json
+import tempfile
+import time
+
+async def run_tests():
+    storage = JsonStorage(tempfile.mkdtemp(prefix="planner_db_"))
+    users = AsyncUser(storage=storage)
+    teams = AsyncTeam(storage=storage)
+    boards = AsyncProjectBoard(storage=storage)
+
+    print("\n1. Creating a user, team and board through the async API...")
+    try:
+        await users.create_user(json.dumps({"name": "async_user", "display_name": "Async User"}))
+        await teams.create_team(json.dumps({
+            "name": "Async Team", "description": "Runs on the event loop", "admin": "user_1"}))
+        board = json.loads(await boards.create_board(json.dumps({
+            "name": "Async Board", "description": "Async tasks", "team_id": "team_1"})))
+        print(f"✓ Created {board['id']}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    print("\n2. Adding tasks concurrently...")
+    try:
+        results = await asyncio.gather(*(boards.add_task(json.dumps({
+            "title": f"Async task {i}",
+            "description": "Added concurrently",
+            "user_id": "user_1",
+            "board_id": "board_1"
+        })) for i in range(50)))
+        task_ids = {json.loads(result)["id"] for result in results}
+        if len(task_ids) == 50 and storage.count("tasks") == 50:
+            print("✓ 50 tasks added with distinct ids")
+        else:
+            print(f"✗ Expected 50 distinct tasks, got {len(task_ids)}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    print("\n3. Identical concurrent reads share one call...")
+    try:
+        calls = []
+        list_boards = boards.manager.list_boards
+        def counted(request):
+            calls.append(request)
+            time.sleep(0.05)
+            return list_boards(request)
+        boards.manager.list_boards = counted
+
+        request = json.dumps({"id": "team_1"})
+        results = await asyncio.gather(*(boards.list_boards(request) for _ in range(10)))
+        boards.manager.list_boards = list_boards
+        if len(calls) == 1 and len(set(results)) == 1:
+            print("✓ 10 concurrent list_boards calls ran once")
+        else:
+            print(f"✗ list_boards ran {len(calls)} times")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    print("\n3b. A read after a write sees the write...")
+    try:
+        list_users = users.manager.list_users
+        def slow(request):
+            result = list_users(request)
+            time.sleep(0.2)
+            return result
+        users.manager.list_users = slow
+
+        # The first read is still running when the user is created
+        earlier = asyncio.ensure_future(users.list_users())
+        await asyncio.sleep(0.01)
+        await users.create_user(json.dumps({"name": "late_user", "display_name": "Late User"}))
+        later = json.loads(await users.list_users())
+        await earlier
+        users.manager.list_users = list_users
+        if "late_user" in [user["name"] for user in later]:
+            print("✓ The read didn't join the one started before the write")
+        else:
+            print("✗ The read missed the user created just before it")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+    print("\n4. The event loop keeps running during a call...")
+    try:
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        tick_task = asyncio.ensure_future(ticker())
+        # Errors are raised to the caller just like with the sync API
+        try:
+            await boards.close_board(json.dumps({"id": "board_1"}))
+            print("✗ Board with open tasks was closed (this shouldn't happen!)")
+        except Exception as e:
+            print(f"✓ Correctly rejected: {e}")
+        await boards.update_task_statuses(json.dumps({"filter": {"board_id": "board_1"}, "status": "COMPLETE"}))
+        await boards.close_board(json.dumps({"id": "board_1"}))
+        tick_task.cancel()
+        if ticks > 0:
+            print(f"✓ Loop ticked {ticks} times while the board was updated")
+        else:
+            print("✗ Loop was blocked")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+def main():
+    print("=" * 50)
+    print("TESTING ASYNC API")
+    print("=" * 50)
+
+    asyncio.run(run_tests())
+
+    print("\n" + "=" * 50)
+    print("TESTS COMPLETED!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,9 @@ To run: python test_board.py
 from planner.user import User
 from planner.team import Team
 from planner.project_board import ProjectBoard
+from planner.storage import JsonStorage
 import json
+import tempfile
 
 def main():
     print("=" * 80)
@@ -188,6 +190,17 @@ def main():
     except Exception as e:
         print(f"✗ Error: {e}")
     
+    print("\n5b. Listing only OPEN boards for Development Team...")
+    try:
+        open_boards = board_manager.list_boards(json.dumps({"id": "team_1", "status": "OPEN"}))
+        statuses = {board["status"] for board in json.loads(open_boards)}
+        if statuses <= {"OPEN"}:
+            print("✓ Only OPEN boards returned")
+        else:
+            print(f"✗ Unexpected statuses: {statuses}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
     print("\n" + "=" * 80)
     print("PART 5: EXPORTING BOARD (THE COOL PART!)")
     print("=" * 80)
@@ -297,6 +310,65 @@ def main():
         except Exception as e:
             print(f"  {task['title']} might already exist")
     
+    print("\n12b. Importing a backlog with add_tasks...")
+    try:
+        response = board_manager.add_tasks(json.dumps({
+            "tasks": [
+                {"title": "Write release notes", "description": "Summarise sprint 2",
+                 "user_id": "user_1", "board_id": "board_2"},
+                {"title": "Write release notes", "description": "Duplicate in batch",
+                 "user_id": "user_2", "board_id": "board_2"},
+                {"title": "Closed board task", "description": "Board 1 is closed",
+                 "user_id": "user_1", "board_id": "board_1"},
+                {"title": "Listed board", "description": "Board id is a list",
+                 "user_id": "user_1", "board_id": ["board_2"]},
+                {"title": 42, "description": "Title is a number",
+                 "user_id": "user_1", "board_id": "board_2"}
+            ]
+        }))
+        results = json.loads(response)["results"]
+        errors = [r for r in results if "error" in r]
+        if len(results) == 5 and len(errors) == 4 and "id" in results[0]:
+            print(f"✓ Created {results[0]['id']}, rejected {len(errors)} invalid tasks")
+        elif len(errors) == 5:
+            print("  Release notes task might already exist")
+        else:
+            print(f"✗ Unexpected results: {results}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    print("\n12c. Moving every OPEN Sprint 2 task to IN_PROGRESS at once...")
+    try:
+        response = board_manager.update_task_statuses(json.dumps({
+            "filter": {"board_id": "board_2", "status": "OPEN"},
+            "status": "IN_PROGRESS"
+        }))
+        results = json.loads(response)["results"]
+        if all(r.get("status") == "IN_PROGRESS" for r in results):
+            print(f"✓ Moved {len(results)} tasks to IN_PROGRESS")
+        else:
+            print(f"✗ Unexpected results: {results}")
+        
+        response = board_manager.update_task_statuses(json.dumps({
+            "updates": [{"id": ["task_1"], "status": "OPEN"}, {"id": "task_1", "status": "COMPLETE"}]
+        }))
+        results = json.loads(response)["results"]
+        if "error" in results[0] and results[1].get("status") == "COMPLETE":
+            print("✓ A malformed task id is reported without aborting the batch")
+        else:
+            print(f"✗ Unexpected results: {results}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    try:
+        board_manager.update_task_statuses(json.dumps({
+            "filter": {"board_id": "board_2", "status": "INPROGRESS"},
+            "status": "COMPLETE"
+        }))
+        print("✗ Accepted a misspelled filter status (this shouldn't happen!)")
+    except Exception as e:
+        print(f"✓ Correctly rejected: {e}")
+    
     print("\n13. Exporting Sprint 2 board...")
     try:
         response = board_manager.export_board(json.dumps({"id": "board_2"}))
@@ -305,6 +377,46 @@ def main():
     except Exception as e:
         print(f"✗ Error: {e}")
     
+    print("\n13b. Exporting both sprints at once on a pool of 2 processes...")
+    try:
+        response = board_manager.export_boards(json.dumps({"ids": ["board_1", "board_2"], "workers": 2}))
+        out_files = json.loads(response)["out_files"]
+        with open(f"out/{out_files[1]}", encoding="utf-8") as batch, \
+                open(f"out/{filename}", encoding="utf-8") as single:
+            same = batch.read() == single.read()
+        if len(out_files) == 2 and same:
+            print(f"✓ Exported {', '.join(out_files)}, identical to export_board")
+        else:
+            print(f"✗ Batch export differs from export_board: {out_files}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    print("\n13c. Exporting Sprint 2 again without changes...")
+    try:
+        response = board_manager.export_board(json.dumps({"id": "board_2"}))
+        if json.loads(response)["out_file"] == filename:
+            print(f"✓ Unchanged board reused out/{filename}")
+        else:
+            print(f"✗ Unchanged board was exported again: {response}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    print("\n13d. Exporting every board while a task points at a board that isn't there...")
+    try:
+        # A separate db folder keeps the orphan task out of the shared one
+        orphan_storage = JsonStorage(tempfile.mkdtemp(prefix="planner_db_"))
+        with orphan_storage.transaction():
+            orphan_storage.put("tasks", "task_1", {
+                "title": "Orphan", "description": "Its board is gone", "user_id": "user_1",
+                "board_id": "board_9", "creation_time": "2024-01-01 09:00:00", "status": "OPEN"})
+        response = ProjectBoard(storage=orphan_storage).export_boards(json.dumps({"workers": 1}))
+        if json.loads(response)["out_files"] == []:
+            print("✓ Tasks of boards outside the export were skipped")
+        else:
+            print(f"✗ Unexpected export: {response}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
     print("\n" + "=" * 80)
     print("🎉 ALL TESTS COMPLETED! 🎉")
     print("=" * 80)
@@ -2,9 +2,11 @@
 To run: python test_team.py
 """
 
+from planner.storage import JsonStorage
 from planner.user import User
 from planner.team import Team
 import json
+import tempfile
 
 def main():
     print("=" * 50)
@@ -204,6 +206,97 @@ def main():
     except Exception as e:
         print(f"✗ Error: {e}")
     
+    print("\n" + "=" * 50)
+    print("PART 7: LARGE TEAMS")
+    print("=" * 50)
+    
+    print("\n13. Adding 120 users to a team in one request...")
+    # A separate db folder keeps the ids used by the other test scripts intact
+    large_storage = JsonStorage(tempfile.mkdtemp(prefix="planner_db_"))
+    large_users = User(storage=large_storage)
+    large_teams = Team(storage=large_storage)
+    
+    try:
+        large_users.import_users(
+            {"name": f"member_{i}", "display_name": f"Member {i}"} for i in range(1, 121))
+        large_teams.create_team(json.dumps({
+            "name": "Whole Company",
+            "description": "Everyone",
+            "admin": "user_1"
+        }))
+        large_teams.add_users_to_team(json.dumps({
+            "id": "team_1",
+            "users": [f"user_{i}" for i in range(1, 121)]
+        }))
+        members = json.loads(large_teams.list_team_users(json.dumps({"id": "team_1"})))
+        if len(members) == 120:
+            print("✓ All 120 users added")
+        else:
+            print(f"✗ Expected 120 members, got {len(members)}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    print("\n14. Testing: Removing a batch that includes the admin changes nothing...")
+    try:
+        large_teams.remove_users_from_team(json.dumps({
+            "id": "team_1",
+            "users": [f"user_{i}" for i in range(1, 61)]
+        }))
+        print("✗ Admin was removed (shouldn't happen!)")
+    except Exception as e:
+        members = json.loads(large_teams.list_team_users(json.dumps({"id": "team_1"})))
+        if len(members) == 120:
+            print(f"✓ Correctly rejected the whole batch: {e}")
+        else:
+            print(f"✗ Batch was partially applied, {len(members)} members left")
+    
+    print("\n15. Listing the members of the large team a page at a time...")
+    try:
+        first = json.loads(large_teams.list_team_users(json.dumps({"id": "team_1", "limit": 50})))
+        second = json.loads(large_teams.list_team_users(json.dumps(
+            {"id": "team_1", "limit": 50, "cursor": first["next_cursor"]})))
+        third = json.loads(large_teams.list_team_users(json.dumps(
+            {"id": "team_1", "limit": 50, "cursor": second["next_cursor"]})))
+        ids = [user["id"] for page in (first, second, third) for user in page["items"]]
+        if ids == [f"user_{i}" for i in range(1, 121)] and third["next_cursor"] is None:
+            print("✓ 120 members over 3 pages, none skipped or repeated")
+        else:
+            print(f"✗ Pages returned {len(ids)} members")
+        
+        # Removing the member a cursor was taken after doesn't end the walk
+        large_teams.remove_users_from_team(json.dumps({"id": "team_1", "users": ["user_50"]}))
+        rest = json.loads(large_teams.list_team_users(json.dumps(
+            {"id": "team_1", "limit": 100, "cursor": first["next_cursor"]})))
+        if rest["items"] and rest["items"][-1]["id"] == "user_120" and rest["next_cursor"] is None:
+            print(f"✓ Walk went on after its cursor member was removed ({len(rest['items'])} more)")
+        else:
+            print(f"✗ Unexpected page after removal: {rest}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    try:
+        large_teams.list_team_users(json.dumps({"id": "team_1", "limit": 0}))
+        print("✗ Accepted a limit of 0 (this shouldn't happen!)")
+    except Exception as e:
+        print(f"✓ Correctly rejected: {e}")
+    
+    print("\n16. Handing a team to an admin who isn't a member yet...")
+    try:
+        response = large_teams.create_team(json.dumps({
+            "name": "Leads",
+            "description": "Team leads",
+            "admin": "user_1"
+        }))
+        leads_id = json.loads(response)["id"]
+        large_teams.update_team(json.dumps({"id": leads_id, "team": {"admin": "user_2"}}))
+        admin_teams = json.loads(large_users.get_user_teams(json.dumps({"id": "user_2"})))
+        if leads_id in [team["id"] for team in admin_teams]:
+            print(f"✓ New admin's teams include {leads_id}")
+        else:
+            print(f"✗ New admin's teams miss {leads_id}: {admin_teams}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
     print("\n" + "=" * 50)
     print("TESTS COMPLETED! ")
     print("=" * 50)
@@ -2,8 +2,11 @@
 To run: python test_user.py
 """
 
+from planner.storage import JsonStorage
 from planner.user import User
 import json
+import tempfile
+import threading
 
 def main():
     print("=" * 50)
@@ -99,6 +102,47 @@ def main():
     except Exception as e:
         print(f"✓ Correctly rejected duplicate: {e}")
     
+    # Test 8
+    print("\n8. Importing users in bulk...")
+    import_records = [
+        json.dumps({"name": "import_user_1", "display_name": "Import User 1"}),
+        {"name": "import_user_2", "display_name": "Import User 2"},
+        {"name": "import_user_1", "display_name": "Duplicate In Import"},
+        {"name": 123, "display_name": "Not A String"},
+        "not json"
+    ]
+    
+    try:
+        # A separate db folder keeps the ids used by the other test scripts intact
+        import_manager = User(storage=JsonStorage(tempfile.mkdtemp(prefix="planner_db_")))
+        # One chunk: the bad records must not roll back the good ones
+        response = json.loads(import_manager.import_users(import_records, chunk_size=10))
+        if response["created"] == 2 and [f["record"] for f in response["failed"]] == [3, 4, 5]:
+            print(f"✓ Imported {response['created']} users, reported {len(response['failed'])} failures")
+        else:
+            print(f"✗ Expected failures to be reported: {response}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
+    print("\n9. Importing overlapping names from two threads in opposite orders...")
+    try:
+        shared_manager = User(storage=JsonStorage(tempfile.mkdtemp(prefix="planner_db_"), journaled=True))
+        names = [f"overlap_{i}" for i in range(200)]
+        responses = []
+        threads = [threading.Thread(target=lambda order: responses.append(json.loads(shared_manager.import_users(
+                       {"name": name, "display_name": "Overlap"} for name in order))), args=(order,))
+                   for order in (names, names[::-1])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if len(responses) == 2 and sum(r["created"] for r in responses) == 200 and shared_manager.storage.count("users") == 200:
+            print("✓ Each name created once, no deadlock between the imports")
+        else:
+            print(f"✗ Imports didn't split the names: {[r['created'] for r in responses]}")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+    
     print("\n" + "=" * 50)
     print("TESTS COMPLETED!")
     print("=" * 50)
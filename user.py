@@ -1,63 +1,55 @@
 import json
-import os
 from datetime import datetime
 
+from .storage import get_storage
+from .storage_base import page_request, transactional
 from .user_base import UserBase  
 
 
 class User(UserBase):
     
     
-    def __init__(self):
-        """Initialize the User class and create db folder if it doesn't exist"""
-        self.db_folder = "db"
-        self.users_file = os.path.join(self.db_folder, "users.json")
-        self.user_teams_file = os.path.join(self.db_folder, "user_teams.json")
+    def __init__(self, storage=None, backend="json"):
+        """Initialize the User class and attach to the shared storage engine"""
+        self.storage = storage or get_storage("db", backend)
+        self.db_folder = self.storage.db_folder
+    
+    def _generate_user_id(self):
+        """Generate a unique user ID from the persisted sequence"""
+        return self.storage.next_id("users")
+    
+    def _build_user(self, req_data):
+        """Validate a user spec and return the new user record"""
+        name = req_data.get("name")
+        display_name = req_data.get("display_name")
         
         
-        if not os.path.exists(self.db_folder):
-            os.makedirs(self.db_folder)
+        if not name or not display_name:
+            raise ValueError("Both name and display_name are required")
         
-        self._initialize_files()
-    
-    def _initialize_files(self):
-        """Create empty JSON files if they don't exist"""
-        if not os.path.exists(self.users_file):
-            with open(self.users_file, 'w') as f:
-                json.dump({}, f)
-        
-        if not os.path.exists(self.user_teams_file):
-            with open(self.user_teams_file, 'w') as f:
-                json.dump({}, f)
-    
-    def _load_users(self):
-        """Load all users from the JSON file"""
-        with open(self.users_file, 'r') as f:
-            return json.load(f)
-    
-    def _save_users(self, users):
-        """Save users to the JSON file"""
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=2)
-    
-    def _load_user_teams(self):
-        """Load user-team mappings from JSON file"""
-        with open(self.user_teams_file, 'r') as f:
-            return json.load(f)
-    
-    def _generate_user_id(self, users):
-        """Generate a unique user ID"""
-        if not users:
-            return "user_1"
-        
-        # Find the highest number and increment
-        max_num = 0
-        for user_id in users.keys():
-            num = int(user_id.split('_')[1])
-            max_num = max(max_num, num)
-        
-        return f"user_{max_num + 1}"
+        if not isinstance(name, str) or not isinstance(display_name, str):
+            raise ValueError("Name and display_name must be strings")
+        
+        if len(name) > 64:
+            raise ValueError("Name cannot exceed 64 characters")
+        
+        if len(display_name) > 64:
+            raise ValueError("Display name cannot exceed 64 characters")
+        
+        # Another thread creating the same name waits for our commit
+        self.storage.lock(("user_names", name))
+        
+        if self.storage.find("users", name=name) is not None:
+            raise ValueError(f"User with name '{name}' already exists")
+        
+        
+        return {
+            "name": name,
+            "display_name": display_name,
+            "creation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
     
+    @transactional
     def create_user(self, request: str) -> str:
         """
         Create a new user
@@ -71,40 +63,13 @@ class User(UserBase):
         try:
             
             req_data = json.loads(request)
-            name = req_data.get("name")
-            display_name = req_data.get("display_name")
-            
-            
-            if not name or not display_name:
-                raise ValueError("Both name and display_name are required")
-            
-            if len(name) > 64:
-                raise ValueError("Name cannot exceed 64 characters")
-            
-            if len(display_name) > 64:
-                raise ValueError("Display name cannot exceed 64 characters")
-            
-            
-            users = self._load_users()
+            user_data = self._build_user(req_data)
             
             
-            for user_id, user_data in users.items():
-                if user_data["name"] == name:
-                    raise ValueError(f"User with name '{name}' already exists")
-            
-            
-            user_id = self._generate_user_id(users)
-            
-            
-            user_data = {
-                "name": name,
-                "display_name": display_name,
-                "creation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            user_id = self._generate_user_id()
             
            
-            users[user_id] = user_data
-            self._save_users(users)
+            self.storage.put("users", user_id, user_data)
             
             
             return json.dumps({"id": user_id})
@@ -114,24 +79,135 @@ class User(UserBase):
         except Exception as e:
             raise Exception(f"Error creating user: {str(e)}")
     
-    def list_users(self) -> str:
+    def import_users(self, source, chunk_size: int = 1000) -> str:
+        """
+        Bulk-create users from a stream of user specs
+        
+        source is either the path of a JSON Lines file (one
+        {"name": ..., "display_name": ...} object per line) or any iterable of
+        such dicts or JSON strings. Records are consumed one at a time and
+        written every chunk_size users; a bad record is reported and skipped
+        without aborting the import.
+        
+        Example response:
+        {
+          "created": 2,
+          "failed": [
+            {"record": 2, "error": "User with name 'john_doe' already exists"}
+          ]
+        }
+        """
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        
+        if isinstance(source, str):
+            with open(source, 'r', encoding="utf-8") as f:
+                return self._import_user_records(f, chunk_size)
+        return self._import_user_records(source, chunk_size)
+    
+    def _import_user_records(self, records, chunk_size):
+        """Create users from an iterable of specs, committing every chunk"""
+        created = 0
+        failed = []
+        records = iter(enumerate(records, 1))
+        
+        done = False
+        while not done:
+            chunk = []
+            while len(chunk) < chunk_size:
+                item = next(records, None)
+                if item is None:
+                    done = True
+                    break
+                position, record = item
+                try:
+                    if isinstance(record, str):
+                        if not record.strip():
+                            continue
+                        record = json.loads(record)
+                    if not isinstance(record, dict):
+                        raise ValueError("Each record must be an object")
+                    chunk.append((position, record))
+                except json.JSONDecodeError:
+                    failed.append({"record": position, "error": "Invalid JSON format in record"})
+                except ValueError as e:
+                    failed.append({"record": position, "error": str(e)})
+            if not chunk:
+                continue
+            
+            # Each chunk is one transaction, so other processes can write
+            # between chunks and a crash loses at most the current chunk
+            with self.storage.transaction():
+                # All names of the chunk are locked in one call, which takes
+                # them in a fixed order: imports of overlapping names would
+                # deadlock if each record locked its name in turn
+                self.storage.lock(*{("user_names", record.get("name")) for _, record in chunk
+                                    if isinstance(record.get("name"), str)})
+                for position, record in chunk:
+                    try:
+                        user_data = self._build_user(record)
+                        self.storage.put("users", self._generate_user_id(), user_data)
+                        created += 1
+                    except Exception as e:
+                        # Nothing of a failed record was written, so the rest
+                        # of the chunk can still be committed
+                        failed.append({"record": position, "error": str(e)})
+        
+        failed.sort(key=lambda failure: failure["record"])
+        return json.dumps({"created": created, "failed": failed})
+    
+    def _summarize_user(self, user_id, user_data):
+        """Return the fields of a user shown by the list APIs"""
+        return {
+            "id": user_id,
+            "name": user_data["name"],
+            "display_name": user_data["display_name"],
+            "creation_time": user_data["creation_time"]
+        }
+    
+    def list_users(self, request: str = None) -> str:
         """
         List all users
         
-        Returns a JSON array of all users
+        Returns a JSON array of all users. A request with a limit, a cursor
+        or both returns one page instead:
+        {
+          "limit": 100,
+          "cursor": "user_100"
+        }
+        -> {"items": [...], "next_cursor": "user_200"}, with next_cursor
+        null on the last page
+        """
+        try:
+            limit, cursor = page_request(json.loads(request) if request else {})
+            if limit is None:
+                records, next_cursor = self.storage.scan("users"), None
+            else:
+                records, next_cursor = self.storage.page("users", limit, cursor)
+            
+            user_list = [self._summarize_user(user_id, user_data) for user_id, user_data in records]
+            
+            if limit is None:
+                return json.dumps(user_list, indent=2)
+            return json.dumps({"items": user_list, "next_cursor": next_cursor}, indent=2)
+        
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON format in request")
+        except Exception as e:
+            raise Exception(f"Error listing users: {str(e)}")
+    
+    def iter_users(self):
         """
-        users = self._load_users()
-        user_list = []
-        
-        for user_id, user_data in users.items():
-            user_list.append({
-                "id": user_id,
-                "name": user_data["name"],
-                "display_name": user_data["display_name"],
-                "creation_time": user_data["creation_time"]
-            })
-        
-        return json.dumps(user_list, indent=2)
+        Yield every user as a dict, reading the storage a page at a time so
+        memory stays flat however many users there are
+        """
+        for user_id, user_data in self.storage.stream("users"):
+            yield self._summarize_user(user_id, user_data)
+    
+    def stream_users(self):
+        """Yield every user as one line of newline-delimited JSON"""
+        for user in self.iter_users():
+            yield json.dumps(user) + "\n"
     
     def describe_user(self, request: str) -> str:
         """
@@ -149,12 +225,11 @@ class User(UserBase):
             if not user_id:
                 raise ValueError("User ID is required")
             
-            users = self._load_users()
+            user_data = self.storage.get("users", user_id)
             
-            if user_id not in users:
+            if user_data is None:
                 raise ValueError(f"User with ID '{user_id}' not found")
             
-            user_data = users[user_id]
             return json.dumps(user_data, indent=2)
         
         except json.JSONDecodeError:
@@ -162,6 +237,7 @@ class User(UserBase):
         except Exception as e:
             raise Exception(f"Error describing user: {str(e)}")
     
+    @transactional
     def update_user(self, request: str) -> str:
         """
         Update user details (display_name only, name cannot be changed)
@@ -182,21 +258,25 @@ class User(UserBase):
             if not user_id:
                 raise ValueError("User ID is required")
             
-            users = self._load_users()
+            self.storage.lock(("users", user_id))
+            user_data = self.storage.get("users", user_id)
             
-            if user_id not in users:
+            if user_data is None:
                 raise ValueError(f"User with ID '{user_id}' not found")
             
+            # Work on a copy so a rejected update never touches the cache
+            user_data = dict(user_data)
+            
             display_name = user_updates.get("display_name")
             if display_name:
                 if len(display_name) > 128:
                     raise ValueError("Display name cannot exceed 128 characters")
-                users[user_id]["display_name"] = display_name
+                user_data["display_name"] = display_name
             
             if "name" in user_updates:
                 raise ValueError("User name cannot be updated")
             
-            self._save_users(users)
+            self.storage.put("users", user_id, user_data)
             
             return json.dumps({"message": "User updated successfully"})
         
@@ -221,12 +301,21 @@ class User(UserBase):
             if not user_id:
                 raise ValueError("User ID is required")
             
-            users = self._load_users()
-            if user_id not in users:
+            if not self.storage.contains("users", user_id):
                 raise ValueError(f"User with ID '{user_id}' not found")
             
-            user_teams = self._load_user_teams()
-            teams = user_teams.get(user_id, [])
+            # Memberships only hold team ids; details come from the teams
+            # collection so they always reflect the latest update_team
+            teams = []
+            for team_id in self.storage.get("user_teams", user_id, []):
+                team_data = self.storage.get("teams", team_id)
+                if team_data is not None:
+                    teams.append({
+                        "id": team_id,
+                        "name": team_data["name"],
+                        "description": team_data["description"],
+                        "creation_time": team_data["creation_time"]
+                    })
             
             return json.dumps(teams, indent=2)
         